@@ -4,10 +4,12 @@ from typing import Optional, Any, Dict
 
 from fastapi import Depends, HTTPException, status, Cookie, WebSocket
 from fastapi.security import APIKeyCookie
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 import jwt
 
+from app.auth.user_cache import user_cache
 from app.sqla.database import get_db
 from app.sqla.models import User
 
@@ -20,6 +22,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 # Token models
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
 
 
 # Cookie security
@@ -39,8 +42,32 @@ def create_access_token(
     return encoded_jwt
 
 
-def get_current_user(
-    session: str = Depends(cookie_scheme), db: Session = Depends(get_db)
+async def load_token_user(db: AsyncSession, token_data: TokenData) -> Optional[User]:
+    """
+    Get the user a token was issued for.
+    Users are served from the user cache when possible; on a miss tokens
+    carrying a user_id claim are resolved by primary key.
+    """
+    user = await user_cache.get(db, token_data.username)
+    if user is not None:
+        return user
+
+    if token_data.user_id is not None:
+        user = await db.get(User, token_data.user_id)
+        # The username is the token subject, a renamed user must log in again
+        if user is not None and user.username != token_data.username:
+            user = None
+    else:
+        user = await db.scalar(select(User).where(User.username == token_data.username))
+
+    if user is not None:
+        user_cache.set(token_data.username, user)
+
+    return user
+
+
+async def get_current_user(
+    session: str = Depends(cookie_scheme), db: AsyncSession = Depends(get_db)
 ) -> User:
     """Verify JWT token and return the current user."""
     credentials_exception = HTTPException(
@@ -54,18 +81,18 @@ def get_current_user(
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("user_id"))
     except jwt.PyJWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await load_token_user(db, token_data)
     if user is None:
         raise credentials_exception
     return user
 
 
 async def get_websocket_user(
-    websocket: WebSocket, db: Session = Depends(get_db)
+    websocket: WebSocket, db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """Authenticate a WebSocket connection using cookies."""
     try:
@@ -81,8 +108,7 @@ async def get_websocket_user(
         if username is None:
             return None
 
-        # Get the user from the database
-        user = db.query(User).filter(User.username == username).first()
-        return user
+        token_data = TokenData(username=username, user_id=payload.get("user_id"))
+        return await load_token_user(db, token_data)
     except Exception:
         return None
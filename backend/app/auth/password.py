@@ -1,7 +1,33 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 from passlib.context import CryptContext
+from pydantic import BaseModel
+
+from app.utils.config import password_hash_concurrency
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+
+class PasswordHashingStats(BaseModel):
+    calls: int = 0
+    waiting: int = 0
+    running: int = 0
+    total_queue_seconds: float = 0
+    max_queue_seconds: float = 0
+
+
+# bcrypt releases the GIL, so hashing in threads doesn't block the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=password_hash_concurrency, thread_name_prefix="password-hashing"
+)
+password_semaphore = asyncio.Semaphore(password_hash_concurrency)
+password_hashing_stats = PasswordHashingStats()
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -9,3 +35,38 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     return pwd_context.hash(password)
+
+
+async def _run_in_password_pool(func: Callable[..., T], *args) -> T:
+    """Run a hashing function in the bounded pool, recording the time spent queued"""
+    stats = password_hashing_stats
+    queued_at = time.perf_counter()
+
+    stats.waiting += 1
+    try:
+        await password_semaphore.acquire()
+    finally:
+        stats.waiting -= 1
+
+    queue_seconds = time.perf_counter() - queued_at
+    stats.calls += 1
+    stats.total_queue_seconds += queue_seconds
+    stats.max_queue_seconds = max(stats.max_queue_seconds, queue_seconds)
+    stats.running += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        stats.running -= 1
+        password_semaphore.release()
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_in_password_pool(get_password_hash, password)
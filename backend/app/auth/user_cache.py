@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.sqla.models import User
+from app.utils.config import user_cache_ttl, user_cache_size
+
+
+class UserCache:
+    """
+    Size-bounded, short-TTL cache of authenticated users keyed by token subject.
+    Cached users are detached copies which are merged into the request session
+    without loading, so a hit costs no database round trip.
+    The cache is local to the worker process.
+    """
+
+    def __init__(self, ttl: float = user_cache_ttl, max_size: int = user_cache_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[str, Tuple[float, User]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, subject: str) -> Optional[User]:
+        """Get a cached user attached to the given session"""
+        entry = self.entries.get(subject)
+
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[subject]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(subject)
+        self.hits += 1
+
+        return await db.merge(entry[1], load=False)
+
+    def set(self, subject: str, user: User) -> None:
+        """Cache a detached copy of a loaded user"""
+        self.entries[subject] = (time.monotonic() + self.ttl, self._detached_copy(user))
+        self.entries.move_to_end(subject)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached entry of a user"""
+        for subject, (_, user) in list(self.entries.items()):
+            if user.id == user_id:
+                del self.entries[subject]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    @staticmethod
+    def _detached_copy(user: User) -> User:
+        copy = User(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            hashed_password=user.hashed_password,
+            avatar_url=user.avatar_url,
+            created_at=user.created_at,
+        )
+        make_transient_to_detached(copy)
+        return copy
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Invalidate the cache whenever a user row changes"""
+    user_cache.invalidate_user(target.id)
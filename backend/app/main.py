@@ -1,18 +1,33 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.staticfiles import StaticFiles
 
-from app.routes import auth, project, view, file
+from app.routes import auth, project, view, file, metrics
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 
 from app.routes.websocket import collaborate, subscribe
-from app.utils.config import allow_origins
+from app.utils.config import allow_origins, metrics_enabled
+from app.websocket.chat_writer import chat_writer
+from app.websocket.presence_sweeper import presence_sweeper
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Every worker drains its share of chat messages into the database
+    chat_writer.start()
+    # and sweeps users left behind by crashed workers out of presence
+    presence_sweeper.start()
+    yield
+    await presence_sweeper.stop()
+    await chat_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.exception_handler(RequestValidationError)
@@ -49,6 +64,9 @@ app.include_router(subscribe.router)
 app.include_router(view.router)
 app.include_router(file.router)
 
+if metrics_enabled:
+    app.include_router(metrics.router)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
@@ -1,4 +1,4 @@
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, List, Optional
 
 from fastapi_camelcase import CamelModel
 
@@ -8,3 +8,5 @@ T = TypeVar("T")
 class PaginatedResponse(CamelModel, Generic[T]):
     data: List[T]
     has_next_page: bool
+    # Opaque cursor of the next page, pass it back to continue the listing
+    next_cursor: Optional[str] = None
@@ -6,6 +6,7 @@ from fastapi_camelcase import CamelModel
 from pydantic import BaseModel
 
 from app.models.user_models import UserDetailResponse
+from app.models.view_models import ViewRead
 from app.sqla.models import File
 
 
@@ -61,6 +62,7 @@ class ProjectDetailResponse(CamelModel):
     created_at: datetime
     owner: UserDetailResponse
     files: List[FileResponse]
+    views: List[ViewRead] = []
 
     class Config:
         from_attributes = True
@@ -0,0 +1,40 @@
+from typing import Optional
+
+import redis
+
+from app.utils.config import project_access_cache_ttl
+
+PROJECT_ACCESS_KEY = "access:project:{project_id}:user:{user_id}"
+
+OWNER_ROLE = "owner"
+SHARED_ROLE = "shared"
+NO_ACCESS_ROLE = "none"
+
+
+def get_cached_project_role(
+    redis_client: redis.Redis, project_id: str, user_id: int
+) -> Optional[str]:
+    """Get the cached role of a user in a project, if any"""
+    return redis_client.get(
+        PROJECT_ACCESS_KEY.format(project_id=project_id, user_id=user_id)
+    )
+
+
+def cache_project_role(
+    redis_client: redis.Redis, project_id: str, user_id: int, role: str
+) -> None:
+    """Cache the role of a user in a project, shared by all workers"""
+    redis_client.set(
+        PROJECT_ACCESS_KEY.format(project_id=project_id, user_id=user_id),
+        role,
+        ex=project_access_cache_ttl,
+    )
+
+
+def invalidate_project_role(
+    redis_client: redis.Redis, project_id: str, user_id: int
+) -> None:
+    """Drop the cached role after a share or ownership change"""
+    redis_client.delete(
+        PROJECT_ACCESS_KEY.format(project_id=project_id, user_id=user_id)
+    )
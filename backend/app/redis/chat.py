@@ -0,0 +1,157 @@
+from typing import List, Tuple, Optional
+
+import redis
+
+from app.redis.models import ChatMessageInfo, ChatMessageEvent
+from app.redis.events import publish_project_event
+from app.utils.config import chat_stream_max_length
+
+# Recent chat events of a project, capped, for clients resuming after a reconnect
+CHAT_STREAM_KEY = "chat:project:{project_id}:stream"
+# Chat messages of all projects waiting to be written to Postgres
+CHAT_PERSIST_STREAM_KEY = "chat:persist"
+CHAT_PERSIST_GROUP = "chat-writers"
+# Chat messages that can't be written to Postgres, kept for inspection
+CHAT_DEAD_LETTER_STREAM_KEY = "chat:persist:dead-letter"
+CHAT_DEAD_LETTER_MAX_LENGTH = 10_000
+
+
+def _parse_stream_id(stream_id: str) -> Optional[Tuple[int, int]]:
+    try:
+        milliseconds, sequence = stream_id.split("-")
+        return int(milliseconds), int(sequence)
+    except ValueError:
+        return None
+
+
+def broadcast_chat_message(
+    redis_client: redis.Redis,
+    chat_message_data: ChatMessageInfo,
+    project_id: str,
+) -> str:
+    """
+    Append a chat message to the stream of its project and to the
+    persistence stream, then publish it with its stream ID.
+    Returns the stream ID.
+    """
+    data = chat_message_data.model_dump_json()
+
+    pipe = redis_client.pipeline()
+    pipe.xadd(
+        CHAT_STREAM_KEY.format(project_id=project_id),
+        {"data": data},
+        maxlen=chat_stream_max_length,
+        approximate=True,
+    )
+    pipe.xadd(CHAT_PERSIST_STREAM_KEY, {"project_id": project_id, "data": data})
+    stream_id, _ = pipe.execute()
+
+    event = ChatMessageEvent(**chat_message_data.model_dump(), stream_id=stream_id)
+    publish_project_event(redis_client, project_id, event.model_dump_json())
+
+    return stream_id
+
+
+def get_missed_chat_events(
+    redis_client: redis.Redis, project_id: str, last_stream_id: str
+) -> Tuple[List[str], bool]:
+    """
+    Get serialized chat events published after the given stream ID.
+    Also returns whether they are complete: older messages are trimmed from
+    the stream, so a client that is too far behind has to refetch history.
+    """
+    last_id = _parse_stream_id(last_stream_id)
+    if last_id is None:
+        return [], False
+
+    stream_key = CHAT_STREAM_KEY.format(project_id=project_id)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.xrange(stream_key, min="-", max="+", count=1)
+    pipe.xrange(stream_key, min=f"({last_stream_id}", max="+")
+    first_entries, entries = pipe.execute()
+
+    # Messages between the last seen one and the oldest retained one may be lost
+    if first_entries and _parse_stream_id(first_entries[0][0]) > last_id:
+        return [], False
+
+    events = []
+    for stream_id, fields in entries:
+        info = ChatMessageInfo.model_validate_json(fields["data"])
+        event = ChatMessageEvent(**info.model_dump(), stream_id=stream_id)
+        events.append(event.model_dump_json())
+
+    return events, True
+
+
+def create_chat_persist_group(redis_client: redis.Redis) -> None:
+    """Create the consumer group of the persistence stream, if it doesn't exist"""
+    try:
+        redis_client.xgroup_create(
+            CHAT_PERSIST_STREAM_KEY, CHAT_PERSIST_GROUP, id="0", mkstream=True
+        )
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def read_chat_persist_batch(
+    redis_client: redis.Redis, consumer: str, count: int, pending: bool = False
+) -> List[Tuple[str, dict]]:
+    """
+    Read chat messages to persist without blocking.
+    With pending, re-read the ones delivered to this consumer but not acknowledged.
+    """
+    response = redis_client.xreadgroup(
+        CHAT_PERSIST_GROUP,
+        consumer,
+        {CHAT_PERSIST_STREAM_KEY: "0" if pending else ">"},
+        count=count,
+    )
+    if not response:
+        return []
+
+    _, entries = response[0]
+    return entries
+
+
+def claim_stale_chat_persist_entries(
+    redis_client: redis.Redis, consumer: str, min_idle_ms: int, count: int
+) -> List[Tuple[str, dict]]:
+    """Take over messages delivered to a writer that stopped before persisting them"""
+    response = redis_client.xautoclaim(
+        CHAT_PERSIST_STREAM_KEY,
+        CHAT_PERSIST_GROUP,
+        consumer,
+        min_idle_time=min_idle_ms,
+        start_id="0-0",
+        count=count,
+    )
+    # Redis 7 adds the IDs of deleted entries as a third element
+    return response[1]
+
+
+def acknowledge_chat_persist_entries(
+    redis_client: redis.Redis,
+    stream_ids: List[str],
+    dead_letters: List[Tuple[dict, str]] = (),
+) -> None:
+    """
+    Acknowledge and remove handled messages from the persistence stream.
+    Messages that could not be persisted are moved to the dead-letter stream
+    with their error, in the same transaction.
+    """
+    if not stream_ids:
+        return
+
+    pipe = redis_client.pipeline()
+    for fields, error in dead_letters:
+        pipe.xadd(
+            CHAT_DEAD_LETTER_STREAM_KEY,
+            {**fields, "error": error},
+            maxlen=CHAT_DEAD_LETTER_MAX_LENGTH,
+            approximate=True,
+        )
+    pipe.xack(CHAT_PERSIST_STREAM_KEY, CHAT_PERSIST_GROUP, *stream_ids)
+    pipe.xdel(CHAT_PERSIST_STREAM_KEY, *stream_ids)
+    pipe.execute()
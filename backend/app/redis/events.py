@@ -0,0 +1,90 @@
+from typing import List, Optional, Tuple
+
+import redis
+
+from app.utils.config import project_event_log_size, project_event_log_ttl
+
+PROJECT_CHANNEL = "project:{project_id}:updates"
+# Last sequence number of the project events, never expires so it stays monotonic
+PROJECT_SEQ_KEY = "project:{project_id}:seq"
+# Recent project events scored by sequence number, for clients resuming after a reconnect
+PROJECT_EVENT_LOG_KEY = "project:{project_id}:events"
+
+# Assigns the next sequence number to an event, appends it to the capped log
+# and publishes it, atomically, so events are published in sequence order.
+# The payload is a compact JSON object, the sequence number is added as its last field.
+PUBLISH_PROJECT_EVENT_LUA = """
+local function publish_project_event(seq_key, log_key, channel, payload, log_size, log_ttl)
+    local seq = redis.call('INCR', seq_key)
+    local sequenced = string.sub(payload, 1, -2) .. ',"seq":' .. seq .. '}'
+    redis.call('ZADD', log_key, seq, sequenced)
+    redis.call('ZREMRANGEBYRANK', log_key, 0, -tonumber(log_size) - 1)
+    redis.call('EXPIRE', log_key, log_ttl)
+    redis.call('PUBLISH', channel, sequenced)
+    return seq
+end
+"""
+
+PUBLISH_EVENT_SCRIPT = PUBLISH_PROJECT_EVENT_LUA + """
+return publish_project_event(KEYS[1], KEYS[2], ARGV[1], ARGV[2], ARGV[3], ARGV[4])
+"""
+
+
+def project_event_keys(project_id: str) -> List[str]:
+    """Keys used by publish_project_event in Lua scripts"""
+    return [
+        PROJECT_SEQ_KEY.format(project_id=project_id),
+        PROJECT_EVENT_LOG_KEY.format(project_id=project_id),
+    ]
+
+
+def publish_project_event(
+    redis_client: redis.Redis, project_id: str, payload: str
+) -> int:
+    """
+    Publish a serialized event to the project channel with the next sequence number.
+    Returns the sequence number.
+    """
+    publish_event = redis_client.register_script(PUBLISH_EVENT_SCRIPT)
+
+    return publish_event(
+        keys=project_event_keys(project_id),
+        args=[
+            PROJECT_CHANNEL.format(project_id=project_id),
+            payload,
+            project_event_log_size,
+            project_event_log_ttl,
+        ],
+    )
+
+
+def get_missed_project_events(
+    redis_client: redis.Redis, project_id: str, last_seq: Optional[int]
+) -> Tuple[int, Optional[List[str]]]:
+    """
+    Get the current sequence number of a project and the serialized events
+    published after the given one.
+    Events are None if they can't be replayed: the client is new, or too far
+    behind for the retained log, and has to load a full snapshot instead.
+    """
+    seq_key, log_key = project_event_keys(project_id)
+
+    pipe = redis_client.pipeline()
+    pipe.get(seq_key)
+    pipe.zrange(log_key, 0, 0, withscores=True)
+    pipe.zrangebyscore(log_key, f"({last_seq or 0}", "+inf")
+    seq, oldest, events = pipe.execute()
+
+    seq = int(seq or 0)
+
+    if last_seq is None or last_seq > seq:
+        return seq, None
+
+    if last_seq == seq:
+        return seq, []
+
+    # Events between the last seen one and the oldest retained one are lost
+    if not oldest or oldest[0][1] > last_seq + 1:
+        return seq, None
+
+    return seq, events
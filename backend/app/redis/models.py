@@ -44,6 +44,24 @@ class InitEventUser(CamelModel):
 class InitEvent(BaseEvent):
     event: str = "init"
     users: List[InitEventUser]
+    # Sequence number of the last project event included in this state
+    seq: int = 0
+    # Missed events follow, otherwise the client has to reload project data
+    resumed: bool = False
+    # The client only receives updates, without being part of presence
+    spectator: bool = False
+
+
+class ViewSyncEvent(BaseEvent):
+    """
+    Sent to a connection after it changed its view, from which point it
+    receives updates of that view only; the client reloads the view data.
+    """
+
+    event: str = "view_sync"
+    view_id: str | None = None
+    file_id: int | None = None
+    users: List[InitEventUser]
 
 
 class UserLeftEvent(BaseEvent):
@@ -72,6 +90,8 @@ class UserViewChangedEvent(BaseEvent):
 class UserFocusChangedEvent(BaseEvent):
     id: int
     focused_row_id: str | None
+    # View the row is focused in, only its viewers receive the event
+    view_id: str | None = None
     event: str = "user_focus_changed"
 
 
@@ -122,3 +142,11 @@ class ChatMessageInfo(BaseModel):
 
 class ChatMessageEvent(BaseEvent, ChatMessageInfo):
     event: str = "chat_message"
+    # Position in the chat stream of the project, used to resume after reconnecting
+    stream_id: Optional[str] = None
+
+
+class ChatResyncEvent(BaseEvent):
+    """Sent when missed chat messages are no longer retained and must be refetched"""
+
+    event: str = "chat_resync"
@@ -0,0 +1,43 @@
+from typing import Optional
+
+import redis
+
+from app.utils.config import project_detail_cache_ttl
+
+PROJECT_DETAIL_KEY = "project:{project_id}:detail"
+# Incremented on every change of the project files or views
+PROJECT_VERSION_KEY = "project:{project_id}:version"
+
+
+def get_cached_project_detail(
+    redis_client: redis.Redis, project_id: str
+) -> Optional[str]:
+    """Get the serialized detail of a project, if it is cached"""
+    return redis_client.get(PROJECT_DETAIL_KEY.format(project_id=project_id))
+
+
+def cache_project_detail(
+    redis_client: redis.Redis, project_id: str, detail_json: str
+) -> None:
+    """Cache the serialized detail of a project, shared by all users and workers"""
+    redis_client.set(
+        PROJECT_DETAIL_KEY.format(project_id=project_id),
+        detail_json,
+        ex=project_detail_cache_ttl,
+    )
+
+
+def invalidate_project_detail(redis_client: redis.Redis, project_id: str) -> None:
+    """
+    Drop the cached detail after a change of the project files or views,
+    and bump the project version for other in-memory copies to notice.
+    """
+    pipeline = redis_client.pipeline()
+    pipeline.delete(PROJECT_DETAIL_KEY.format(project_id=project_id))
+    pipeline.incr(PROJECT_VERSION_KEY.format(project_id=project_id))
+    pipeline.execute()
+
+
+def get_project_version(redis_client: redis.Redis, project_id: str) -> int:
+    """Get the version of a project, changed whenever its files or views change"""
+    return int(redis_client.get(PROJECT_VERSION_KEY.format(project_id=project_id)) or 0)
@@ -1,5 +1,6 @@
+import contextlib
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
 import redis
 
@@ -33,3 +34,14 @@ async def get_redis() -> AsyncGenerator[redis.Redis, None]:
         yield client
     finally:
         client.close()
+
+
+@contextlib.asynccontextmanager
+async def redis_context() -> AsyncIterator[redis.Redis]:
+    """Context manager for getting and cleaning up Redis client outside of requests"""
+    redis_gen = get_redis()
+    try:
+        client = await redis_gen.__anext__()
+        yield client
+    finally:
+        await redis_gen.aclose()
@@ -1,9 +1,7 @@
 import json
-import random
 from typing import Optional, List, Dict, Any
 
 import redis
-from fastapi import HTTPException
 
 from app.redis.models import (
     UserPresence,
@@ -16,15 +14,35 @@ from app.redis.models import (
     FilterSortPreference,
     FilterSortUpdateEvent,
 )
+from app.redis.events import (
+    PROJECT_CHANNEL,
+    PUBLISH_PROJECT_EVENT_LUA,
+    project_event_keys,
+    publish_project_event,
+)
+from app.utils.config import (
+    project_event_log_size,
+    project_event_log_ttl,
+    presence_max_users,
+)
 
 USER_PRESENCE_KEY = "presence:project:{project_id}:users"
-PROJECT_CHANNEL = "project:{project_id}:updates"
+USER_CONNECTIONS_KEY = "presence:project:{project_id}:user:{user_id}:connections"
+# Present users of a project scored by the time they were last seen alive
+USER_LIVENESS_KEY = "presence:project:{project_id}:liveness"
+# Projects that may have present users, checked by the presence sweeper
+PRESENCE_PROJECTS_KEY = "presence:projects"
+# Taken color slots of a project, as a bitmap, and the slot of each present user
+USER_COLOR_BITMAP_KEY = "presence:project:{project_id}:colors"
+USER_COLOR_SLOTS_KEY = "presence:project:{project_id}:color_slots"
 USER_FILTER_SORT_KEY = "options:project:{project_id}:view:{view_id}:user:{user_id}"
 SUBSCRIPTION_CHANNEL = (
     "options:project:{project_id}:view:{view_id}:user:{user_id}:updates"
 )
 
 PRESENCE_TIMEOUT = 30
+# Connections that weren't refreshed for this long belong to a dead worker
+CONNECTION_TIMEOUT = PRESENCE_TIMEOUT
 
 # Coming from Catppuccin latte palette
 USER_COLORS = [
@@ -34,35 +52,50 @@ USER_COLORS = [
     "#8839ef",  # Mauve
     "#fe640b",  # Peach
     "#dc8a78",  # Rosewater
+    "#1e66f5",  # Blue
+    "#df8e1d",  # Yellow
+    "#ea76cb",  # Pink
+    "#179299",  # Teal
+    "#d20f39",  # Red
+    "#7287fd",  # Lavender
+    "#dd7878",  # Flamingo
+    "#209fb5",  # Sapphire
 ]
 
-MAX_USERS = 6
-
-
-async def get_user_color(
-    redis_client: redis.Redis,
-    project_id: str,
-) -> Optional[str]:
-    """Assign a color to user, ensuring uniqueness within project."""
-
-    presence_key = USER_PRESENCE_KEY.format(project_id=project_id)
-    current_users = redis_client.hgetall(presence_key)
-
-    taken_colors = set()
-    for user_json in current_users.values():
-        try:
-            user_data = json.loads(user_json)
-            if "color" in user_data:
-                taken_colors.add(user_data["color"])
-        except (json.JSONDecodeError, KeyError):
-            pass
-
-    available_colors = [c for c in USER_COLORS if c not in taken_colors]
-
-    if available_colors:
-        return random.choice(available_colors)
-
-    return None
+# Releases the color slot of a user leaving presence
+RELEASE_COLOR_SLOT_LUA = """
+local function release_color_slot(slots_key, bitmap_key, user_id)
+    local slot = redis.call('HGET', slots_key, user_id)
+    if slot then
+        redis.call('SETBIT', bitmap_key, slot, 0)
+        redis.call('HDEL', slots_key, user_id)
+    end
+end
+"""
+
+# Reserves a place in presence for a user, unless the project is full,
+# and gives them the lowest free color slot.
+# Returns the slot, or -1 if the project is full.
+JOIN_PROJECT_SCRIPT = """
+local present = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not present and redis.call('ZCOUNT', KEYS[1], ARGV[3], '+inf') >= tonumber(ARGV[4]) then
+    return -1
+end
+local slot = redis.call('HGET', KEYS[3], ARGV[1])
+if not slot then
+    slot = redis.call('BITPOS', KEYS[2], 0)
+    redis.call('SETBIT', KEYS[2], slot, 1)
+    redis.call('HSET', KEYS[3], ARGV[1], slot)
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('SADD', KEYS[4], ARGV[5])
+return tonumber(slot)
+"""
+
+
+def get_color(color_slot: int) -> str:
+    """Color of a slot; colors repeat in projects with more users than colors"""
+    return USER_COLORS[color_slot % len(USER_COLORS)]
 
 
 async def add_user_to_project(
@@ -71,68 +104,211 @@ async def add_user_to_project(
     user_id: int,
     username: str,
     avatar_url: Optional[str] = None,
-) -> None:
-    """Add user to project presence and publish join notification"""
-
-    active_users = redis_client.hlen(USER_PRESENCE_KEY.format(project_id=project_id))
+    max_users: int = presence_max_users,
+) -> bool:
+    """
+    Add user to project presence and publish join notification.
+    Returns False if the project already has the maximum number of users present.
+    """
+    now = redis_client.time()[0]
+    user_id_field = str(user_id)
 
-    if active_users >= MAX_USERS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Maximum of {MAX_USERS} concurrent users reached for this project",
-        )
+    join_project = redis_client.register_script(JOIN_PROJECT_SCRIPT)
+    color_slot = join_project(
+        keys=[
+            USER_LIVENESS_KEY.format(project_id=project_id),
+            USER_COLOR_BITMAP_KEY.format(project_id=project_id),
+            USER_COLOR_SLOTS_KEY.format(project_id=project_id),
+            PRESENCE_PROJECTS_KEY,
+        ],
+        args=[user_id_field, now, now - PRESENCE_TIMEOUT, max_users, project_id],
+    )
 
-    color = await get_user_color(redis_client, project_id)
-    if not color:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Maximum of {MAX_USERS} concurrent users reached for this project",
-        )
+    if color_slot < 0:
+        return False
 
+    color = get_color(color_slot)
     user_presence = UserPresence(
         username=username,
         color=color,
-        joined_at=redis_client.time()[0],
+        joined_at=now,
         avatar_url=avatar_url,
     )
 
-    presence_key = USER_PRESENCE_KEY.format(project_id=project_id)
-    user_id_field = str(user_id)
-
-    # Set user presence with timeout
-    redis_client.hset(presence_key, user_id_field, user_presence.model_dump_json())
-
-    redis_client.hexpire(presence_key, PRESENCE_TIMEOUT, user_id_field)
+    # Set user presence, it is removed by the sweeper unless kept alive
+    redis_client.hset(
+        USER_PRESENCE_KEY.format(project_id=project_id),
+        user_id_field,
+        user_presence.model_dump_json(),
+    )
 
     joined_event = UserJoinedEvent(
         id=user_id, username=username, color=color, avatar_url=avatar_url
     )
 
-    redis_client.publish(
-        PROJECT_CHANNEL.format(project_id=project_id), joined_event.model_dump_json()
-    )
-
+    publish_project_event(redis_client, project_id, joined_event.model_dump_json())
+
+    return True
+
+
+# Removes a connection and, if it was the user's last live one,
+# removes the user from presence and publishes the leave event atomically,
+# so a concurrent connection on another worker can't be overridden.
+# Users that didn't make it into presence leave without an event.
+UNREGISTER_CONNECTION_SCRIPT = PUBLISH_PROJECT_EVENT_LUA + RELEASE_COLOR_SLOT_LUA + """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+local remaining = redis.call('ZCARD', KEYS[1])
+if remaining == 0 then
+    redis.call('ZREM', KEYS[5], ARGV[3])
+    release_color_slot(KEYS[6], KEYS[7], ARGV[3])
+    if redis.call('HDEL', KEYS[2], ARGV[3]) == 1 then
+        publish_project_event(KEYS[3], KEYS[4], ARGV[4], ARGV[5], ARGV[6], ARGV[7])
+    end
+end
+return remaining
+"""
+
+
+async def register_user_connection(
+    redis_client: redis.Redis, project_id: str, user_id: int, connection_id: str
+) -> int:
+    """
+    Register a live connection of a user in a project.
+    Returns the number of live connections of the user across all workers.
+    """
+    key = USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=user_id)
+    now = redis_client.time()[0]
+
+    pipeline = redis_client.pipeline()
+    pipeline.zremrangebyscore(key, "-inf", now - CONNECTION_TIMEOUT)
+    pipeline.zadd(key, {connection_id: now})
+    pipeline.zcard(key)
+    pipeline.expire(key, CONNECTION_TIMEOUT)
+    _, _, connection_count, _ = pipeline.execute()
+
+    return connection_count
+
+
+async def unregister_user_connection(
+    redis_client: redis.Redis, project_id: str, user_id: int, connection_id: str
+) -> int:
+    """
+    Unregister a connection of a user in a project.
+    The user is removed from presence when no live connections remain.
+    Returns the number of remaining live connections across all workers.
+    """
+    key = USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=user_id)
+    now = redis_client.time()[0]
+    left_event = UserLeftEvent(id=user_id)
 
-async def remove_user_from_project(
-    redis_client: redis.Redis, project_id: str, user_id: int
-) -> None:
-    """Remove user from project presence and publish leave notification"""
+    unregister_connection = redis_client.register_script(UNREGISTER_CONNECTION_SCRIPT)
 
-    redis_client.hdel(USER_PRESENCE_KEY.format(project_id=project_id), str(user_id))
+    return unregister_connection(
+        keys=[
+            key,
+            USER_PRESENCE_KEY.format(project_id=project_id),
+            *project_event_keys(project_id),
+            USER_LIVENESS_KEY.format(project_id=project_id),
+            USER_COLOR_SLOTS_KEY.format(project_id=project_id),
+            USER_COLOR_BITMAP_KEY.format(project_id=project_id),
+        ],
+        args=[
+            connection_id,
+            now - CONNECTION_TIMEOUT,
+            str(user_id),
+            PROJECT_CHANNEL.format(project_id=project_id),
+            left_event.model_dump_json(),
+            project_event_log_size,
+            project_event_log_ttl,
+        ],
+    )
 
-    left_event = UserLeftEvent(id=user_id)
 
-    redis_client.publish(
-        PROJECT_CHANNEL.format(project_id=project_id), left_event.model_dump_json()
+# Removes users of a project not seen alive since the cutoff, e.g. of a crashed
+# worker, publishes a leave event for each of them, and forgets the project
+# once nobody is present, atomically, so concurrent sweepers remove a user once.
+SWEEP_PRESENCE_SCRIPT = PUBLISH_PROJECT_EVENT_LUA + RELEASE_COLOR_SLOT_LUA + """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if #stale > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    for _, user_id in ipairs(stale) do
+        release_color_slot(KEYS[6], KEYS[7], user_id)
+        if redis.call('HDEL', KEYS[2], user_id) == 1 then
+            local payload = string.format(ARGV[3], user_id)
+            publish_project_event(KEYS[3], KEYS[4], ARGV[2], payload, ARGV[4], ARGV[5])
+        end
+    end
+end
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[5], ARGV[6])
+end
+return #stale
+"""
+
+
+async def sweep_stale_users(redis_client: redis.Redis) -> int:
+    """
+    Remove users that stopped refreshing their presence from all projects.
+    Runs one sweep per project with present users, in a single pipelined round trip.
+    Returns the number of removed users.
+    """
+    project_ids = redis_client.smembers(PRESENCE_PROJECTS_KEY)
+    if not project_ids:
+        return 0
+
+    cutoff = redis_client.time()[0] - PRESENCE_TIMEOUT
+    # The user ID is formatted into the event in Lua
+    left_event_template = (
+        UserLeftEvent(id=0).model_dump_json().replace('"id":0', '"id":%s')
     )
 
+    sweep_presence = redis_client.register_script(SWEEP_PRESENCE_SCRIPT)
+    pipeline = redis_client.pipeline(transaction=False)
+
+    for project_id in project_ids:
+        sweep_presence(
+            keys=[
+                USER_LIVENESS_KEY.format(project_id=project_id),
+                USER_PRESENCE_KEY.format(project_id=project_id),
+                *project_event_keys(project_id),
+                PRESENCE_PROJECTS_KEY,
+                USER_COLOR_SLOTS_KEY.format(project_id=project_id),
+                USER_COLOR_BITMAP_KEY.format(project_id=project_id),
+            ],
+            args=[
+                cutoff,
+                PROJECT_CHANNEL.format(project_id=project_id),
+                left_event_template,
+                project_event_log_size,
+                project_event_log_ttl,
+                project_id,
+            ],
+            client=pipeline,
+        )
+
+    return sum(pipeline.execute())
+
 
 async def get_active_users(redis_client: redis.Redis, project_id: str) -> List[Dict]:
-    """Get list of active users in a project"""
-    users_data = redis_client.hgetall(USER_PRESENCE_KEY.format(project_id=project_id))
+    """
+    Get list of active users in a project.
+    Users not seen alive recently are left out, even before they are swept.
+    """
+    now = redis_client.time()[0]
+
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.hgetall(USER_PRESENCE_KEY.format(project_id=project_id))
+    pipeline.zrangebyscore(
+        USER_LIVENESS_KEY.format(project_id=project_id), now - PRESENCE_TIMEOUT, "+inf"
+    )
+    users_data, live_user_ids = pipeline.execute()
+    live_user_ids = set(live_user_ids)
 
     result = []
     for user_id, user_json in users_data.items():
+        if user_id not in live_user_ids:
+            continue
         try:
             user_data = json.loads(user_json)
             response = UserPresenceResponse(
@@ -146,22 +322,76 @@ async def get_active_users(redis_client: redis.Redis, project_id: str) -> List[D
     return result
 
 
-async def heartbeat_user_presence(
-    redis_client: redis.Redis, project_id: str, user_id: int
-) -> None:
-    """Refresh user presence timeout"""
+async def get_active_user_counts(
+    redis_client: redis.Redis, project_ids: List[str]
+) -> Dict[str, int]:
+    """
+    Count active users of many projects at once.
+    Sends one ZCOUNT of recently seen users per project,
+    all in a single pipelined round trip.
+    """
+    if not project_ids:
+        return {}
+
+    now = redis_client.time()[0]
+
+    pipe = redis_client.pipeline(transaction=False)
+    for project_id in project_ids:
+        pipe.zcount(
+            USER_LIVENESS_KEY.format(project_id=project_id),
+            now - PRESENCE_TIMEOUT,
+            "+inf",
+        )
 
-    presence_key = USER_PRESENCE_KEY.format(project_id=project_id)
-    user_id_field = str(user_id)
+    return dict(zip(project_ids, pipe.execute()))
+
+
+async def refresh_users_presence(
+    redis_client: redis.Redis, project_connections: Dict[str, Dict[int, List[str]]]
+) -> Dict[str, List[int]]:
+    """
+    Refresh liveness of many users and their live connections at once.
+    Takes connection ids grouped by project and user.
+    Sends one ZADD per project, all in a single pipelined round trip.
+    Users that are no longer present are not added back; they are returned
+    by project, e.g. to rejoin users swept while their worker was stalled.
+    """
+    now = redis_client.time()[0]
+    pipeline = redis_client.pipeline(transaction=False)
+    refreshed_projects = []
+
+    for project_id, user_connections in project_connections.items():
+        if not user_connections:
+            continue
+
+        liveness_key = USER_LIVENESS_KEY.format(project_id=project_id)
+        user_ids = list(user_connections)
+        pipeline.zadd(
+            liveness_key, {str(user_id): now for user_id in user_ids}, xx=True
+        )
+        pipeline.zmscore(liveness_key, [str(user_id) for user_id in user_ids])
+        refreshed_projects.append((project_id, user_ids))
 
-    user_exists = redis_client.hexists(presence_key, user_id_field)
+        for user_id, connection_ids in user_connections.items():
+            key = USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=user_id)
+            pipeline.zadd(key, {connection_id: now for connection_id in connection_ids})
+            pipeline.expire(key, CONNECTION_TIMEOUT)
 
-    if user_exists:
-        redis_client.hexpire(
-            USER_PRESENCE_KEY.format(project_id=project_id),
-            PRESENCE_TIMEOUT,
-            user_id_field,
-        )
+    results = iter(pipeline.execute())
+
+    missing_users = {}
+    for project_id, user_ids in refreshed_projects:
+        # ZADD count, scores, then ZADD and EXPIRE of every user's connections
+        next(results)
+        scores = next(results)
+        for _ in range(2 * len(user_ids)):
+            next(results)
+
+        missing = [user_id for user_id, score in zip(user_ids, scores) if score is None]
+        if missing:
+            missing_users[project_id] = missing
+
+    return missing_users
 
 
 async def update_user_view(
@@ -185,15 +415,18 @@ async def update_user_view(
 
     redis_client.hset(presence_key, user_id_field, json.dumps(user_data))
 
-    redis_client.hexpire(presence_key, PRESENCE_TIMEOUT, user_id_field)
+    redis_client.zadd(
+        USER_LIVENESS_KEY.format(project_id=project_id),
+        {user_id_field: redis_client.time()[0]},
+        xx=True,
+    )
 
     view_changed_event = UserViewChangedEvent(
         id=user_id, current_view_id=current_view_id
     )
 
-    redis_client.publish(
-        PROJECT_CHANNEL.format(project_id=project_id),
-        view_changed_event.model_dump_json(),
+    publish_project_event(
+        redis_client, project_id, view_changed_event.model_dump_json()
     )
 
 
@@ -202,8 +435,12 @@ async def update_user_focus(
     project_id: str,
     user_id: int,
     focused_row_id: Optional[str],
+    view_id: Optional[str] = None,
 ) -> None:
-    """Update the row a user is focused on and publish update notification"""
+    """
+    Update the row a user is focused on and publish update notification.
+    The event is routed to the view the focus was changed on.
+    """
 
     presence_key = USER_PRESENCE_KEY.format(project_id=project_id)
     user_id_field = str(user_id)
@@ -218,15 +455,20 @@ async def update_user_focus(
 
     redis_client.hset(presence_key, user_id_field, json.dumps(user_data))
 
-    redis_client.hexpire(presence_key, PRESENCE_TIMEOUT, user_id_field)
+    redis_client.zadd(
+        USER_LIVENESS_KEY.format(project_id=project_id),
+        {user_id_field: redis_client.time()[0]},
+        xx=True,
+    )
 
     focus_changed_event = UserFocusChangedEvent(
-        id=user_id, focused_row_id=focused_row_id
+        id=user_id,
+        focused_row_id=focused_row_id,
+        view_id=view_id,
     )
 
-    redis_client.publish(
-        PROJECT_CHANNEL.format(project_id=project_id),
-        focus_changed_event.model_dump_json(),
+    publish_project_event(
+        redis_client, project_id, focus_changed_event.model_dump_json()
     )
 
 
@@ -3,10 +3,11 @@ from typing import Any
 
 from fastapi import APIRouter, status, Depends, HTTPException, Response
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import create_access_token, get_current_user
-from app.auth.password import get_password_hash, verify_password
+from app.auth.password import get_password_hash_async, verify_password_async
 from app.models.user_models import (
     UserCreateResponse,
     UserCreateRequest,
@@ -23,41 +24,43 @@ router = APIRouter(prefix="/auth")
     "/register", response_model=UserCreateResponse, status_code=status.HTTP_201_CREATED
 )
 async def register_user(
-    request: UserCreateRequest, db: Session = Depends(get_db)
+    request: UserCreateRequest, db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
     Register a new user with email validation and password hashing.
     """
-    if db.query(User).filter(User.email == request.email).first():
+    if await db.scalar(select(User).where(User.email == request.email)):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
         )
 
-    if db.query(User).filter(User.username == request.username).first():
+    if await db.scalar(select(User).where(User.username == request.username)):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Username already taken"
         )
 
+    hashed_password = await get_password_hash_async(request.password)
+
     try:
         new_user = User(
             username=request.username,
             email=request.email,
-            hashed_password=get_password_hash(request.password),
+            hashed_password=hashed_password,
         )
 
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
 
         return new_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Registration failed. Please try again.",
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}",
@@ -67,17 +70,19 @@ async def register_user(
 # TODO: check whether the cookie is set
 @router.post("/login", response_model=UserLoginResponse)
 async def login(
-    request: UserLoginRequest, response: Response, db: Session = Depends(get_db)
+    request: UserLoginRequest, response: Response, db: AsyncSession = Depends(get_db)
 ) -> Any:
-    user = db.query(User).filter(User.username == request.username).first()
-    if not user or not verify_password(request.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.username == request.username))
+    if not user or not await verify_password_async(
+        request.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data={"sub": user.username, "user_id": user.id})
 
     response.set_cookie(
         key="session",
@@ -1,10 +1,14 @@
+import redis
 from fastapi import APIRouter, Path, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_user
 from app.models.view_models import TableSchemaResponse
+from app.redis.storage import get_redis
 from app.sqla.database import get_db
-from app.sqla.models import User, FileColumn, ProjectShare, Project, File
+from app.sqla.models import User, FileColumn, File
+from app.sqla.project_auth import check_project_access
 
 router = APIRouter(prefix="/files")
 
@@ -13,32 +17,18 @@ router = APIRouter(prefix="/files")
 async def get_file_schema(
     file_id: int = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
-    file = db.query(File).filter(File.id == file_id).first()
+    file = await db.get(File, file_id)
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    project = db.query(Project).filter(Project.id == file.project_id).first()
+    await check_project_access(db, redis_client, file.project_id, current_user.id)
 
-    is_owner = project.owner_id == current_user.id
-
-    is_shared_with_user = (
-        db.query(ProjectShare)
-        .filter(
-            ProjectShare.project_id == project.id,
-            ProjectShare.user_id == current_user.id,
-        )
-        .first()
-        is not None
-    )
-
-    if not (is_owner or is_shared_with_user):
-        raise HTTPException(
-            status_code=403, detail="You don't have permission to access this file"
-        )
-
-    columns = db.query(FileColumn).filter(FileColumn.file_id == file_id).all()
+    columns = (
+        await db.scalars(select(FileColumn).where(FileColumn.file_id == file_id))
+    ).all()
 
     return TableSchemaResponse(
         columns=columns,
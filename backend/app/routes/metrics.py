@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+
+from app.auth.password import password_hashing_stats
+from app.auth.user_cache import user_cache
+from app.sqla.database import get_pool_status
+from app.websocket.chat_writer import chat_writer
+from app.websocket.collaboration_manager import collaboration_manager
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/collaboration")
+async def get_collaboration_metrics():
+    """
+    Get outbound queue depth and dropped message counters per project.
+    Values are local to the worker process serving the request.
+    """
+    return {"projects": collaboration_manager.get_metrics()}
+
+
+@router.get("/auth")
+async def get_auth_metrics():
+    """
+    Get hit and miss counters of the authenticated user cache
+    and queue times of password hashing.
+    Values are local to the worker process serving the request.
+    """
+    return {
+        "user_cache": user_cache.get_stats(),
+        "password_hashing": password_hashing_stats.model_dump(),
+    }
+
+
+@router.get("/database")
+async def get_database_metrics():
+    """
+    Get occupancy of the database connection pool
+    with checkout counters and wait times.
+    Values are local to the worker process serving the request.
+    """
+    return {"pool": get_pool_status()}
+
+
+@router.get("/chat")
+async def get_chat_metrics():
+    """
+    Get batch sizes and lag of chat messages written to the database.
+    Values are local to the worker process serving the request.
+    """
+    return {"writer": chat_writer.stats.model_dump()}
@@ -1,4 +1,5 @@
 import pathlib
+from datetime import datetime, timezone
 from typing import List, Tuple, Optional
 from uuid import UUID
 
@@ -12,10 +13,12 @@ from fastapi import (
     UploadFile,
     HTTPException,
     Query,
+    Response,
 )
 from fastapi.params import Path
-from sqlalchemy import desc, exists, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Select, desc, exists, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload
 from starlette.status import (
     HTTP_422_UNPROCESSABLE_ENTITY,
     HTTP_404_NOT_FOUND,
@@ -28,9 +31,16 @@ from app.auth.dependencies import get_current_user
 from app.models.user_models import UserDetailResponse
 from app.redis.models import UserPresenceResponse
 from app.redis.storage import get_redis
-from app.redis.users import get_active_users
-from app.sqla.project_auth import check_user_project_access, check_project_ownership
+from app.redis.users import get_active_users, get_active_user_counts
+from app.redis.access import invalidate_project_role
+from app.redis.projects import get_cached_project_detail, cache_project_detail
+from app.sqla.project_auth import (
+    check_project_access,
+    check_project_detail_access,
+    check_project_ownership,
+)
 from app.utils.file_storage import LocalFileStorageService, FileStorageService
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.models.base_models import PaginatedResponse
 from app.models.project_models import (
     ProjectCreateResponse,
@@ -60,7 +70,7 @@ def get_storage_service():
 
 
 def get_file_repository(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     storage_service: FileStorageService = Depends(get_storage_service),
 ):
     return FileRepository(db_session=db, storage_service=storage_service)
@@ -69,6 +79,8 @@ def get_file_repository(
 router = APIRouter(prefix="/projects")
 
 MAX_FILES = 3
+# Upper bound of the presence limit a project can set
+MAX_ACTIVE_USERS = 500
 
 
 async def process_file(upload_file: UploadFile) -> ParsedFile:
@@ -89,7 +101,9 @@ async def process_file(upload_file: UploadFile) -> ParsedFile:
         raise ValueError(f"Error parsing file {upload_file.filename}: {str(e)}")
 
 
-async def save_parsed_file_data(db: Session, file_id: int, parsed_file: ParsedFile):
+async def save_parsed_file_data(
+    db: AsyncSession, file_id: int, parsed_file: ParsedFile
+):
     """Save parsed file data (columns and rows) to the database."""
     for column in parsed_file.columns:
         db_column = FileColumn(
@@ -103,7 +117,7 @@ async def save_parsed_file_data(db: Session, file_id: int, parsed_file: ParsedFi
         db_row = FileRow(file_id=file_id, row_data=row_data)
         db.add(db_row)
 
-    db.flush()
+    await db.flush()
 
 
 async def cleanup_saved_files(
@@ -121,8 +135,9 @@ async def cleanup_saved_files(
 async def create_project(
     title: str = Form(..., min_length=3, max_length=100),
     description: str = Form(None),
+    max_active_users: Optional[int] = Form(None, ge=1, le=MAX_ACTIVE_USERS),
     files: List[UploadFile] = FastAPIFile(..., max_items=MAX_FILES),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     file_repository: FileRepository = Depends(get_file_repository),
     user: User = Depends(get_current_user),
 ):
@@ -141,10 +156,15 @@ async def create_project(
                 detail="Title cannot be empty",
             )
 
-        project = Project(title=title, description=description, owner_id=user.id)
+        project = Project(
+            title=title,
+            description=description,
+            owner_id=user.id,
+            max_active_users=max_active_users,
+        )
         db.add(project)
 
-        db.flush()
+        await db.flush()
 
         processed_files = []
         file_errors = []
@@ -163,7 +183,7 @@ async def create_project(
                 file_errors.append({"filename": file.filename, "error": str(e)})
 
         if file_errors:
-            db.rollback()
+            await db.rollback()
 
             await cleanup_saved_files(file_repository.storage_service, saved_file_paths)
 
@@ -172,54 +192,78 @@ async def create_project(
                 detail=f"Failed to process all files: {file_errors}",
             )
 
-        db.commit()
+        await db.commit()
 
         return project
     except Exception as _:
-        db.rollback()
+        await db.rollback()
 
         await cleanup_saved_files(file_repository.storage_service, saved_file_paths)
 
         raise
 
 
+def paginate_projects(query: Select, page: int, page_size: int, cursor: Optional[str]):
+    """
+    Order a project query newest first and apply pagination.
+    A cursor continues after the last project of the previous page;
+    without one the page number is used as an offset.
+    """
+    if cursor:
+        created_at, project_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Project.created_at, Project.id) < (created_at, project_id)
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    # Fetch one extra project to know if there is a next page
+    return query.order_by(desc(Project.created_at), desc(Project.id)).limit(
+        page_size + 1
+    )
+
+
 @router.get(path="", response_model=PaginatedResponse[ProjectListResponse])
 async def list_user_projects(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis),
 ):
-    offset = (page - 1) * page_size
-
-    subquery = (
-        select(ProjectShare.project_id)
-        .where(ProjectShare.project_id == Project.id)
-        .exists()
-        .label("is_shared")
-    )
+    # Select the page first, so that shares are aggregated only for its projects
+    page_query = paginate_projects(
+        select(Project).where(Project.owner_id == current_user.id),
+        page,
+        page_size,
+        cursor,
+    ).subquery()
+    page_project = aliased(Project, page_query)
 
     query = (
-        db.query(Project, subquery)
-        .filter(Project.owner_id == current_user.id)
-        .order_by(desc(Project.created_at))
-        .offset(offset)
-        .limit(page_size + 1)
+        select(page_project, (func.count(ProjectShare.user_id) > 0).label("is_shared"))
+        .outerjoin(ProjectShare, ProjectShare.project_id == page_project.id)
+        .group_by(*page_query.c)
+        .order_by(desc(page_project.created_at), desc(page_project.id))
     )
 
-    results = query.all()
+    results = (await db.execute(query)).all()
     has_next_page = len(results) > page_size
 
     # Trim the extra result used for pagination
     if has_next_page:
         results = results[:page_size]
 
+    # Count active users of the whole page in one round trip
+    active_user_counts = await get_active_user_counts(
+        redis_client, [str(project.id) for project, _ in results]
+    )
+
     # Create response objects directly from query results
     projects = []
 
     for project, is_shared in results:
-        active_users = await get_active_users(redis_client, str(project.id))
         projects.append(
             ProjectListResponse(
                 id=project.id,
@@ -228,47 +272,56 @@ async def list_user_projects(
                 created_at=project.created_at,
                 owner_id=project.owner_id,
                 is_shared=is_shared,
-                active_user_count=len(active_users),
+                active_user_count=active_user_counts[str(project.id)],
             )
         )
 
-    return PaginatedResponse(data=projects, has_next_page=has_next_page)
+    next_cursor = None
+    if has_next_page:
+        last_project, _ = results[-1]
+        next_cursor = encode_cursor(last_project.created_at, last_project.id)
+
+    return PaginatedResponse(
+        data=projects, has_next_page=has_next_page, next_cursor=next_cursor
+    )
 
 
 @router.get("/shared", response_model=PaginatedResponse[ProjectListResponse])
 async def list_shared_projects(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get all projects that are shared with the current user.
     """
-    offset = (page - 1) * page_size
-
-    query = (
-        db.query(Project, User.username.label("owner_username"))
+    query = paginate_projects(
+        select(Project, User.username.label("owner_username"))
         .join(ProjectShare, ProjectShare.project_id == Project.id)
         .join(User, User.id == Project.owner_id)
-        .filter(ProjectShare.user_id == current_user.id)
-        .order_by(desc(Project.created_at))
-        .offset(offset)
-        .limit(page_size + 1)
+        .where(ProjectShare.user_id == current_user.id),
+        page,
+        page_size,
+        cursor,
     )
 
-    results = query.all()
+    results = (await db.execute(query)).all()
 
     has_next_page = len(results) > page_size
 
     if has_next_page:
         results = results[:page_size]
 
+    active_user_counts = await get_active_user_counts(
+        redis_client, [str(project.id) for project, _ in results]
+    )
+
     shared_projects = []
 
     for project, owner_username in results:
-        active_users = await get_active_users(redis_client, str(project.id))
         shared_projects.append(
             ProjectListResponse(
                 id=project.id,
@@ -278,19 +331,26 @@ async def list_shared_projects(
                 owner_id=project.owner_id,
                 owner_username=owner_username,
                 is_shared=True,
-                active_user_count=len(active_users),
+                active_user_count=active_user_counts[str(project.id)],
             )
         )
 
-    return PaginatedResponse(data=shared_projects, has_next_page=has_next_page)
+    next_cursor = None
+    if has_next_page:
+        last_project, _ = results[-1]
+        next_cursor = encode_cursor(last_project.created_at, last_project.id)
+
+    return PaginatedResponse(
+        data=shared_projects, has_next_page=has_next_page, next_cursor=next_cursor
+    )
 
 
-def get_invited_user(db: Session, username: str) -> User:
+async def get_invited_user(db: AsyncSession, username: str) -> User:
     """
     Find a user by username.
     Raises 404 if not found.
     """
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
 
     if not user:
         raise HTTPException(
@@ -300,34 +360,39 @@ def get_invited_user(db: Session, username: str) -> User:
     return user
 
 
-def check_existing_share(
-    db: Session, project_id: UUID, user_id: int
+async def check_existing_share(
+    db: AsyncSession, project_id: UUID, user_id: int
 ) -> Optional[ProjectShare]:
     """
     Check if a user is already invited to a project.
     Returns the share if it exists, None otherwise.
     """
-    return (
-        db.query(ProjectShare)
-        .filter(ProjectShare.project_id == project_id, ProjectShare.user_id == user_id)
-        .first()
-    )
+    return await db.get(ProjectShare, (project_id, user_id))
 
 
 @router.get("/{project_id}", response_model=ProjectDetailResponse)
 async def get_project(
     project_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
-    Get project metadata and files by ID.
+    Get project metadata, files and views by ID.
     Available for the owner and shared users.
     """
-    # Check access and get project
-    project, _ = check_user_project_access(db, project_id, current_user.id)
+    # The detail is the same for every user, only access is checked per user
+    cached_detail = get_cached_project_detail(redis_client, str(project_id))
+    if cached_detail is not None:
+        await check_project_access(db, redis_client, project_id, current_user.id)
+        return Response(content=cached_detail, media_type="application/json")
+
+    # Check access and get project with its relationships
+    project = await check_project_detail_access(
+        db, redis_client, project_id, current_user.id
+    )
 
-    # Build response with files
+    # Build response with files and views
     response = ProjectDetailResponse(
         id=project.id,
         title=project.title,
@@ -335,30 +400,36 @@ async def get_project(
         created_at=project.created_at,
         owner=project.user,
         files=[FileResponse.from_orm(file) for file in project.files],
+        views=project.views,
     )
 
-    return response
+    detail_json = response.model_dump_json(by_alias=True)
+    cache_project_detail(redis_client, str(project_id), detail_json)
+
+    return Response(content=detail_json, media_type="application/json")
 
 
 @router.get("/{project_id}/shared-users", response_model=List[UserDetailResponse])
 async def list_shared_users(
     project_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     List all users that the project is shared with.
     """
     # Check access
-    check_user_project_access(db, project_id, current_user.id)
+    await check_project_access(db, redis_client, project_id, current_user.id)
 
     # Get all users with whom the project is shared
     shared_users = (
-        db.query(User)
-        .join(ProjectShare, ProjectShare.user_id == User.id)
-        .filter(ProjectShare.project_id == project_id)
-        .all()
-    )
+        await db.scalars(
+            select(User)
+            .join(ProjectShare, ProjectShare.user_id == User.id)
+            .where(ProjectShare.project_id == project_id)
+        )
+    ).all()
 
     return shared_users
 
@@ -368,17 +439,18 @@ async def invite_user(
     project_id: UUID = Path(...),
     username: str = Query(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Invite a user to the project.
     Can only be called by the project owner.
     """
     # Check if current user is the owner
-    check_project_ownership(db, project_id, current_user.id)
+    await check_project_ownership(db, project_id, current_user.id)
 
     # Find the user to invite
-    invited_user = get_invited_user(db, username)
+    invited_user = await get_invited_user(db, username)
 
     # Check if user is already the owner
     if invited_user.id == current_user.id:
@@ -388,7 +460,7 @@ async def invite_user(
         )
 
     # Check if user is already invited
-    existing_share = check_existing_share(db, project_id, invited_user.id)
+    existing_share = await check_existing_share(db, project_id, invited_user.id)
 
     if existing_share:
         raise HTTPException(
@@ -400,7 +472,10 @@ async def invite_user(
     new_share = ProjectShare(project_id=project_id, user_id=invited_user.id)
 
     db.add(new_share)
-    db.commit()
+    await db.commit()
+
+    # The invited user may have a cached "no access" role
+    invalidate_project_role(redis_client, str(project_id), invited_user.id)
 
     return {"message": f"User '{username}' has been invited to the project"}
 
@@ -409,44 +484,98 @@ async def invite_user(
 async def get_project_active_users(
     project_id: UUID,
     user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get list of active users in a project.
     This REST endpoint is useful for getting the user list before connecting via WebSocket.
     """
-    check_user_project_access(db, project_id, user.id)
+    await check_project_access(db, redis_client, project_id, user.id)
     active_users = await get_active_users(redis_client, str(project_id))
     return active_users
 
 
+async def get_chat_message_sort_key(
+    db: AsyncSession, project_id: UUID, message_id: UUID
+) -> Tuple[datetime, UUID]:
+    """(created_at, id) of a chat message of the project, used as a page boundary"""
+    sort_key = (
+        await db.execute(
+            select(ChatMessage.created_at, ChatMessage.id).where(
+                ChatMessage.project_id == project_id, ChatMessage.id == message_id
+            )
+        )
+    ).first()
+    if sort_key is None:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Chat message '{message_id}' not found",
+        )
+    return tuple(sort_key)
+
+
 @router.get("/{project_id}/chat-messages", response_model=List[ChatMessageResponse])
 async def get_chat_messages(
     project_id: UUID = Path(...),
+    before: Optional[UUID] = Query(None),
+    after: Optional[UUID] = Query(None),
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
-    Get all chat messages for a project.
+    Get a page of chat messages for a project, oldest first.
+    By default the latest messages are returned. Use before/after with
+    a message ID of the project to page through history, or since with
+    the created_at of the last message a client has, in milliseconds,
+    to fetch only the messages it has missed.
     Available for the owner and shared users.
     """
-    check_user_project_access(db, project_id, current_user.id)
+    if sum(anchor is not None for anchor in (before, after, since)) > 1:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Only one of before, after and since can be used",
+        )
+
+    await check_project_access(db, redis_client, project_id, current_user.id)
+
+    sort_key = tuple_(ChatMessage.created_at, ChatMessage.id)
 
     query = (
-        db.query(ChatMessage)
+        select(ChatMessage)
         .options(joinedload(ChatMessage.user), joinedload(ChatMessage.view))
-        .filter(ChatMessage.project_id == project_id)
-        .order_by(ChatMessage.created_at)
+        .where(ChatMessage.project_id == project_id)
+        .limit(limit)
     )
 
-    results = query.all()
+    if after is not None or since is not None:
+        if after is not None:
+            after_key = await get_chat_message_sort_key(db, project_id, after)
+            query = query.where(sort_key > tuple_(*after_key))
+        else:
+            # created_at is returned in whole milliseconds, so skip the rest of that one
+            since_time = datetime.fromtimestamp((since + 1) / 1000, tz=timezone.utc)
+            query = query.where(ChatMessage.created_at >= since_time)
+        query = query.order_by(ChatMessage.created_at, ChatMessage.id)
+    else:
+        if before is not None:
+            before_key = await get_chat_message_sort_key(db, project_id, before)
+            query = query.where(sort_key < tuple_(*before_key))
+        # Take the newest messages, they are put back in order below
+        query = query.order_by(desc(ChatMessage.created_at), desc(ChatMessage.id))
+
+    results = (await db.scalars(query)).all()
+    if after is None and since is None:
+        results = results[::-1]
 
     messages = [
         ChatMessageResponse(
             id=message.id,
             content=message.content,
-            created_at=int(message.created_at.timestamp()) * 1000,
+            created_at=int(message.created_at.timestamp() * 1000),
             user=UserChatResponse(
                 id=message.user.id,
                 username=message.user.username,
@@ -5,8 +5,10 @@ from uuid import UUID
 import redis
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.params import Path
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import with_polymorphic
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
@@ -36,6 +38,7 @@ from app.models.view_models import (
     ChartDataPoint,
 )
 from app.redis.models import RowUpdateInfo
+from app.redis.projects import invalidate_project_detail
 from app.redis.storage import get_redis
 from app.redis.views import update_row
 from app.sqla.database import get_db
@@ -46,45 +49,47 @@ from app.sqla.models import (
     FileColumn,
     FileRow,
     File,
-    Project,
     DiscreteColumnChartView,
 )
-from app.sqla.project_auth import check_user_project_access
+from app.sqla.project_auth import check_project_access
 
 router = APIRouter(prefix="/views")
 
 
-def check_view_exists_and_access(
-    db: Session, view_id: UUID, user_id: int
-) -> tuple[View, Project, bool]:
+async def check_view_exists_and_access(
+    db: AsyncSession, redis_client: redis.Redis, view_id: UUID, user_id: int
+) -> tuple[View, bool]:
     """
     Check if a view exists and if the user has access to it.
-    Returns tuple of (view, project, is_owner).
+    Returns tuple of (view, is_owner).
     Raises 404 if view not found, 403 if no access.
     """
-    view = db.query(View).filter(View.id == view_id).first()
+    # Load the subclass columns eagerly, they can't be lazy loaded later
+    view_entity = with_polymorphic(View, "*")
+    view = await db.scalar(select(view_entity).where(view_entity.id == view_id))
 
     if not view:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="View not found")
 
     # Check project access
-    project, is_owner = check_user_project_access(db, view.project_id, user_id)
+    is_owner = await check_project_access(db, redis_client, view.project_id, user_id)
 
-    return view, project, is_owner
+    return view, is_owner
 
 
 @router.get("/project/{project_id}", response_model=ViewListResponse)
 async def list_project_views(
     project_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get a list of all views for a project.
     Available for the owner and shared users.
     """
-    project, _ = check_user_project_access(db, project_id, current_user.id)
-    views = db.query(View).filter(View.project_id == project_id).all()
+    await check_project_access(db, redis_client, project_id, current_user.id)
+    views = (await db.scalars(select(View).where(View.project_id == project_id))).all()
     return ViewListResponse(views=views)
 
 
@@ -92,13 +97,16 @@ async def list_project_views(
 async def get_view_schema(
     view_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get the schema for a simple table view.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -106,17 +114,17 @@ async def get_view_schema(
             detail="Schema is only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
         )
 
     columns = (
-        db.query(FileColumn).filter(FileColumn.file_id == simple_view.file_id).all()
-    )
+        await db.scalars(
+            select(FileColumn).where(FileColumn.file_id == simple_view.file_id)
+        )
+    ).all()
 
     return TableSchemaResponse(
         columns=columns,
@@ -128,13 +136,16 @@ async def get_view_schema(
 async def get_view_rows(
     view_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get all rows for a simple table view.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -142,15 +153,15 @@ async def get_view_rows(
             detail="Rows are only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
         )
 
-    rows = db.query(FileRow).filter(FileRow.file_id == simple_view.file_id).all()
+    rows = (
+        await db.scalars(select(FileRow).where(FileRow.file_id == simple_view.file_id))
+    ).all()
 
     response_rows = [
         FileRowResponse(id=row.id, data=row.row_data, version=row.version)
@@ -169,19 +180,18 @@ async def create_simple_table_view(
     project_id: UUID,
     view_data: SimpleTableViewCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Create a new simple table view for a project.
     Available for the owner and shared users.
     """
     # Check access to the project
-    project, _ = check_user_project_access(db, project_id, current_user.id)
+    await check_project_access(db, redis_client, project_id, current_user.id)
 
-    file = (
-        db.query(File)
-        .filter(File.id == view_data.file_id, File.project_id == project_id)
-        .first()
+    file = await db.scalar(
+        select(File).where(File.id == view_data.file_id, File.project_id == project_id)
     )
 
     if not file:
@@ -197,8 +207,11 @@ async def create_simple_table_view(
     )
 
     db.add(view)
-    db.commit()
-    db.refresh(view)
+    await db.commit()
+    await db.refresh(view)
+
+    # The project detail lists the views of the project
+    invalidate_project_detail(redis_client, str(project_id))
 
     return view
 
@@ -243,13 +256,15 @@ async def update_cell(
     row_id: UUID = Path(...),
     cell_data: CellUpdateRequest = ...,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Update a single cell in a row with validation and concurrency control.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -257,9 +272,7 @@ async def update_cell(
             detail="Cell updates are only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
@@ -267,10 +280,10 @@ async def update_cell(
         )
 
     # Find the row to update
-    row = (
-        db.query(FileRow)
-        .filter(FileRow.id == row_id, FileRow.file_id == simple_view.file_id)
-        .first()
+    row = await db.scalar(
+        select(FileRow).where(
+            FileRow.id == row_id, FileRow.file_id == simple_view.file_id
+        )
     )
 
     if not row:
@@ -287,13 +300,11 @@ async def update_cell(
         )
 
     # Get column information for type validation
-    column = (
-        db.query(FileColumn)
-        .filter(
+    column = await db.scalar(
+        select(FileColumn).where(
             FileColumn.file_id == simple_view.file_id,
             FileColumn.column_name == cell_data.column_name,
         )
-        .first()
     )
 
     if not column:
@@ -309,32 +320,28 @@ async def update_cell(
     row_data[cell_data.column_name] = validated_value
 
     try:
-        result = (
-            db.query(FileRow)
-            .filter(FileRow.id == row_id, FileRow.version == cell_data.row_version)
-            .update(
-                {
-                    "row_data": row_data,
-                    "version": FileRow.version + 1,
-                }
-            )
+        result = await db.execute(
+            update(FileRow)
+            .where(FileRow.id == row_id, FileRow.version == cell_data.row_version)
+            .values(row_data=row_data, version=FileRow.version + 1)
+            .execution_options(synchronize_session=False)
         )
 
-        if result == 0:
+        if result.rowcount == 0:
             # No rows were updated - another concurrent update happened
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=HTTP_409_CONFLICT,
                 detail="Row was modified by another user while processing your request",
             )
 
-        db.commit()
+        await db.commit()
 
         event_info = RowUpdateInfo(
             row_id=str(row.id),
             column_name=cell_data.column_name,
             value=validated_value,
-            row_version=row.version,
+            row_version=cell_data.row_version + 1,
             view_id=str(view_id),
             file_id=simple_view.file_id,
         )
@@ -348,13 +355,13 @@ async def update_cell(
         return CellUpdateResponse(success=True)
 
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
             detail=f"Database integrity error: {str(e)}",
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}",
@@ -365,9 +372,12 @@ async def update_cell(
 async def get_view_sort_model(
     view_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -375,9 +385,7 @@ async def get_view_sort_model(
             detail="Sort model is only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
@@ -395,13 +403,16 @@ async def update_view_sort_model(
     view_id: UUID = Path(...),
     sort_data: SortModelUpdate = ...,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Update the sort model for a simple table view.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -409,9 +420,7 @@ async def update_view_sort_model(
             detail="Sort model is only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
@@ -419,8 +428,10 @@ async def update_view_sort_model(
 
     # Validate column names exist
     columns = (
-        db.query(FileColumn).filter(FileColumn.file_id == simple_view.file_id).all()
-    )
+        await db.scalars(
+            select(FileColumn).where(FileColumn.file_id == simple_view.file_id)
+        )
+    ).all()
     column_names = {col.column_name for col in columns}
 
     for sort_item in sort_data.sort_model:
@@ -439,8 +450,8 @@ async def update_view_sort_model(
     sort_model_dict = [item.model_dump() for item in sort_data.sort_model]
 
     simple_view.sort_model = sort_model_dict
-    db.commit()
-    db.refresh(simple_view)
+    await db.commit()
+    await db.refresh(simple_view)
 
     return SortModelResponse(sort_model=sort_data.sort_model)
 
@@ -449,13 +460,16 @@ async def update_view_sort_model(
 async def get_view_filter_model(
     view_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get the filter model for a simple table view.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -463,9 +477,7 @@ async def get_view_filter_model(
             detail="Filter model is only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
@@ -479,13 +491,16 @@ async def update_view_filter_model(
     view_id: UUID = Path(...),
     filter_data: FilterModelUpdate = ...,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Update the filter model for a simple table view.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "simple_table":
         raise HTTPException(
@@ -493,9 +508,7 @@ async def update_view_filter_model(
             detail="Filter model is only available for simple table views",
         )
 
-    simple_view = (
-        db.query(SimpleTableView).filter(SimpleTableView.id == view_id).first()
-    )
+    simple_view = await db.get(SimpleTableView, view_id)
     if not simple_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Simple table view not found"
@@ -503,8 +516,8 @@ async def update_view_filter_model(
 
     # Store the filter model as-is since it's an arbitrary dictionary
     simple_view.filter_model = filter_data.filter_model
-    db.commit()
-    db.refresh(simple_view)
+    await db.commit()
+    await db.refresh(simple_view)
 
     return FilterModelResponse(filter_model=filter_data.filter_model)
 
@@ -518,20 +531,19 @@ async def create_discrete_column_chart_view(
     project_id: UUID,
     view_data: DiscreteColumnChartViewCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Create a new discrete column chart view for a project.
     Available for the owner and shared users.
     """
     # Check access to the project
-    project, _ = check_user_project_access(db, project_id, current_user.id)
+    await check_project_access(db, redis_client, project_id, current_user.id)
 
     # Verify file exists and belongs to the project
-    file = (
-        db.query(File)
-        .filter(File.id == view_data.file_id, File.project_id == project_id)
-        .first()
+    file = await db.scalar(
+        select(File).where(File.id == view_data.file_id, File.project_id == project_id)
     )
 
     if not file:
@@ -541,13 +553,11 @@ async def create_discrete_column_chart_view(
         )
 
     # Verify column exists and belongs to the file
-    column = (
-        db.query(FileColumn)
-        .filter(
+    column = await db.scalar(
+        select(FileColumn).where(
             FileColumn.id == view_data.column_id,
             FileColumn.file_id == view_data.file_id,
         )
-        .first()
     )
 
     if not column:
@@ -564,8 +574,11 @@ async def create_discrete_column_chart_view(
     )
 
     db.add(view)
-    db.commit()
-    db.refresh(view)
+    await db.commit()
+    await db.refresh(view)
+
+    # The project detail lists the views of the project
+    invalidate_project_detail(redis_client, str(project_id))
 
     return view
 
@@ -577,14 +590,17 @@ MAX_CHART_DATA_POINTS = 5
 async def get_chart_data(
     view_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
 ):
     """
     Get the chart data for a discrete column chart view.
     Returns aggregated data with the top 5 values and an "Other" category.
     Available for the owner and shared users.
     """
-    view, _, _ = check_view_exists_and_access(db, view_id, current_user.id)
+    view, _ = await check_view_exists_and_access(
+        db, redis_client, view_id, current_user.id
+    )
 
     if view.view_type != "discrete_column_chart":
         raise HTTPException(
@@ -592,27 +608,26 @@ async def get_chart_data(
             detail="Chart data is only available for discrete column chart views",
         )
 
-    chart_view = (
-        db.query(DiscreteColumnChartView)
-        .filter(DiscreteColumnChartView.id == view_id)
-        .first()
-    )
+    chart_view = await db.get(DiscreteColumnChartView, view_id)
     if not chart_view:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail="Discrete column chart view not found",
         )
 
-    column = db.query(FileColumn).filter(FileColumn.id == chart_view.column_id).first()
+    column = await db.get(FileColumn, chart_view.column_id)
     if not column:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Column not found")
 
     value_counts = {}
-    for row in db.query(FileRow).filter(FileRow.file_id == chart_view.file_id):
-        if column.column_name in row.row_data:
+    row_data_stream = await db.stream_scalars(
+        select(FileRow.row_data).where(FileRow.file_id == chart_view.file_id)
+    )
+    async for row_data in row_data_stream:
+        if column.column_name in row_data:
             value = (
-                str(row.row_data[column.column_name])
-                if row.row_data[column.column_name] is not None
+                str(row_data[column.column_name])
+                if row_data[column.column_name] is not None
                 else "None"
             )
             value_counts[value] = value_counts.get(value, 0) + 1
@@ -1,24 +1,29 @@
-import json
 import uuid
+from typing import Optional
 from uuid import UUID
 
-import redis
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+from sqlalchemy import select
 from starlette import status
 
 from app.auth.dependencies import get_websocket_user
+from app.redis.chat import get_missed_chat_events
+from app.redis.events import get_missed_project_events
 from app.redis.models import (
     InitEvent,
+    ChatResyncEvent,
 )
-from app.redis.storage import get_redis
+from app.redis.storage import redis_context
 from app.redis.users import (
     get_active_users,
 )
-from app.routes.project import check_user_project_access
-from app.sqla.database import get_db
-from app.utils.config import allow_origins
+from app.sqla.database import SessionLocal
+from app.sqla.models import Project
+from app.sqla.project_auth import check_project_access
+from app.utils.config import allow_origins, presence_max_users
 from app.websocket.collaboration_manager import collaboration_manager
+from app.websocket.connection_writer import OutboundMessage
+from app.websocket.encoding import negotiate_encoding, receive_message
 from app.websocket.logging import logger
 from app.websocket.message_handlers import CollaborationMessageHandler
 
@@ -29,9 +34,13 @@ router = APIRouter()
 async def collaborate(
     websocket: WebSocket,
     project_id: UUID,
-    db: Session = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis),
+    last_seq: Optional[int] = None,
+    last_chat_id: Optional[str] = None,
+    encoding: Optional[str] = None,
+    spectate: bool = False,
 ):
+    # No session or Redis client is held for the lifetime of the socket,
+    # they are acquired only while a step needs them
     origin = websocket.headers.get("origin")
     if origin not in allow_origins:
         raise HTTPException(
@@ -39,7 +48,8 @@ async def collaborate(
             detail="Origin not allowed"
         )
 
-    user = await get_websocket_user(websocket, db)
+    async with SessionLocal() as db:
+        user = await get_websocket_user(websocket, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,33 +60,78 @@ async def collaborate(
 
     try:
         # Verify project access
-        check_user_project_access(db, project_id, user.id)
+        async with SessionLocal() as db:
+            async with redis_context() as redis_client:
+                await check_project_access(db, redis_client, project_id, user.id)
+            max_active_users = await db.scalar(
+                select(Project.max_active_users).where(Project.id == project_id)
+            )
 
         # Connect to collaboration manager
-        await collaboration_manager.connect(websocket, project_id, user, connection_id)
+        encoding, subprotocol = negotiate_encoding(websocket, encoding)
+        spectator = await collaboration_manager.connect(
+            websocket,
+            project_id,
+            user,
+            connection_id,
+            encoding,
+            subprotocol,
+            max_users=max_active_users or presence_max_users,
+            spectator=spectate,
+        )
 
-        # Send initial state
-        active_users = await get_active_users(redis_client, str(project_id))
-        init_event = InitEvent(users=active_users)
-        await websocket.send_text(init_event.model_dump_json())
+        # Send initial state, with the events missed while the client was
+        # disconnected if they are still retained
+        async with redis_context() as redis_client:
+            seq, missed_events = get_missed_project_events(
+                redis_client, str(project_id), last_seq
+            )
+            active_users = await get_active_users(redis_client, str(project_id))
+
+        resumed = missed_events is not None
+        init_event = InitEvent(
+            users=active_users, seq=seq, resumed=resumed, spectator=spectator
+        )
+        initial_messages = [init_event.model_dump_json()]
+
+        if resumed:
+            # Presence is already part of the initial state
+            initial_messages += [
+                event
+                for event in missed_events
+                if not OutboundMessage.from_json(event).droppable
+            ]
+        elif last_chat_id:
+            # Chat keeps a longer history, replay it even without the other events
+            async with redis_context() as redis_client:
+                missed_chat_events, complete = get_missed_chat_events(
+                    redis_client, str(project_id), last_chat_id
+                )
+
+            if not complete:
+                missed_chat_events = [ChatResyncEvent().model_dump_json()]
+
+            initial_messages += missed_chat_events
+
+        await collaboration_manager.start_delivery(
+            project_id, user.id, connection_id, initial_messages
+        )
 
         message_handler = CollaborationMessageHandler(
             websocket=websocket,
             project_id=project_id,
             user=user,
-            redis_client=redis_client,
-            db=db,
+            connection_id=connection_id,
         )
 
         # Main message loop
         try:
             while True:
-                data = await websocket.receive_text()
-                try:
-                    message = json.loads(data)
-                    await message_handler.handle_message(message)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON received from user {user.id}")
+                message = await receive_message(websocket)
+                if message is None:
+                    logger.warning(f"Invalid message received from user {user.id}")
+                    continue
+                await message_handler.handle_message(message)
 
         except WebSocketDisconnect:
             # Handle normal disconnection
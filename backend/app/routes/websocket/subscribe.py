@@ -1,12 +1,15 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException, APIRouter
-from sqlalchemy.orm import Session
+
+from fastapi import WebSocket, WebSocketDisconnect, HTTPException, APIRouter
 from starlette import status
 
 from app.auth.dependencies import get_websocket_user
-from app.routes.project import check_user_project_access
-from app.sqla.database import get_db
+from app.redis.storage import redis_context
+from app.sqla.database import SessionLocal
+from app.sqla.project_auth import check_project_access
 from app.utils.config import allow_origins
+from app.websocket.encoding import negotiate_encoding, receive_message
 from app.websocket.logging import logger
 from app.websocket.subscription_manager import subscription_manager
 
@@ -21,8 +24,9 @@ async def filter_sort_subscription(
     project_id: UUID,
     watched_user_id: int,
     view_id: str,
-    db: Session = Depends(get_db),
+    encoding: Optional[str] = None,
 ):
+    # No session or Redis client is held for the lifetime of the socket
     origin = websocket.headers.get("origin")
     if origin not in allow_origins:
         raise HTTPException(
@@ -30,7 +34,8 @@ async def filter_sort_subscription(
             detail="Origin not allowed"
         )
 
-    watcher = await get_websocket_user(websocket, db)
+    async with SessionLocal() as db:
+        watcher = await get_websocket_user(websocket, db)
     if not watcher:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,11 +49,20 @@ async def filter_sort_subscription(
         )
 
     try:
-        check_user_project_access(db, project_id, watcher.id)
-        check_user_project_access(db, project_id, watched_user_id)
+        async with SessionLocal() as db:
+            async with redis_context() as redis_client:
+                await check_project_access(db, redis_client, project_id, watcher.id)
+                await check_project_access(db, redis_client, project_id, watched_user_id)
 
+        encoding, subprotocol = negotiate_encoding(websocket, encoding)
         connected = await subscription_manager.connect_subscription(
-            websocket, project_id, watcher.id, watched_user_id, view_id
+            websocket,
+            project_id,
+            watcher.id,
+            watched_user_id,
+            view_id,
+            encoding,
+            subprotocol,
         )
 
         if not connected:
@@ -56,7 +70,7 @@ async def filter_sort_subscription(
 
         try:
             while True:
-                data = await websocket.receive_text()
+                await receive_message(websocket)
 
         except WebSocketDisconnect:
             pass
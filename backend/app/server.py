@@ -0,0 +1,20 @@
+import uvicorn
+
+from app.utils.config import server_host, server_port, server_reload, ws_max_size
+from app.websocket.compression import CompressedWebSocketProtocol
+
+
+def main() -> None:
+    """Run the app with the configured WebSocket protocol"""
+    uvicorn.run(
+        "app.main:app",
+        host=server_host,
+        port=server_port,
+        reload=server_reload,
+        ws=CompressedWebSocketProtocol,
+        ws_max_size=ws_max_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
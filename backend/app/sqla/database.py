@@ -1,8 +1,23 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
+import time
+from typing import AsyncGenerator, Optional
+
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from app.utils.config import (
+    db_pool_size,
+    db_max_overflow,
+    db_pool_timeout,
+    db_pool_recycle,
+    db_pool_pre_ping,
+)
 
 load_dotenv()
 
@@ -13,30 +28,107 @@ DB_PORT = os.getenv("POSTGRES_PORT")
 DB_NAME = os.getenv("POSTGRES_DB")
 
 SQLALCHEMY_DATABASE_URL = (
-    f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-engine = create_engine(
+
+class PoolStats(BaseModel):
+    """Checkout counters of the connection pool"""
+
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    timeouts: int = 0
+    # Checkouts that found no free connection, and how long they waited
+    waits: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+pool_stats = PoolStats()
+
+
+class MonitoredQueue(AsyncAdaptedQueue):
+    """
+    Pool queue measuring how long a checkout waits for a connection to be returned.
+    Opening new connections happens outside of the queue, so it is not counted,
+    and neither is a checkout finding a free connection right away.
+    """
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        if not block or not self.empty():
+            return super().get(block, timeout)
+
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool measuring waits for a free connection and counting timeouts"""
+
+    _queue_class = MonitoredQueue
+
+    def _do_get(self):
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+
+
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True,
+    poolclass=MonitoredQueuePool,
+    pool_size=db_pool_size,
+    max_overflow=db_max_overflow,
+    pool_timeout=db_pool_timeout,
+    pool_recycle=db_pool_recycle,
+    pool_pre_ping=db_pool_pre_ping,
 )
 
-SessionLocal = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine)
-)
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.checkouts += 1
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_stats.checkins += 1
+
+
+def get_pool_status() -> dict:
+    """Current occupancy of the connection pool along with its counters"""
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": db_max_overflow,
+        **pool_stats.model_dump(),
+    }
+
+
+# Objects stay usable after commit, lazy loading isn't available with asyncio
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
-Base.query = SessionLocal.query_property()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
-        SessionLocal.remove()
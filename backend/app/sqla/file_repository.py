@@ -3,7 +3,8 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 
 from app.utils.file_storage import FileStorageService
@@ -13,7 +14,7 @@ from app.sqla.models import File
 class FileRepository:
     """Repository for file operations."""
 
-    def __init__(self, db_session: Session, storage_service: FileStorageService):
+    def __init__(self, db_session: AsyncSession, storage_service: FileStorageService):
         self.db = db_session
         self.storage_service = storage_service
 
@@ -37,7 +38,7 @@ class FileRepository:
         )
 
         self.db.add(file)
-        self.db.flush()
+        await self.db.flush()
 
         return file
 
@@ -51,23 +52,26 @@ class FileRepository:
                 detail=f"Unsupported file type. Supported types: {', '.join(valid_extensions)}",
             )
 
-    def get_project_files(self, project_id: int) -> List[File]:
+    async def get_project_files(self, project_id: int) -> List[File]:
         """Get all files for a project."""
-        return self.db.query(File).filter(File.project_id == project_id).all()
+        result = await self.db.scalars(
+            select(File).where(File.project_id == project_id)
+        )
+        return list(result.all())
 
-    def get_file(self, file_id: int) -> Optional[File]:
+    async def get_file(self, file_id: int) -> Optional[File]:
         """Get a file by ID."""
-        return self.db.query(File).filter(File.id == file_id).first()
+        return await self.db.get(File, file_id)
 
     async def delete_file(self, file_id: int) -> bool:
         """Delete a file."""
-        file = self.get_file(file_id)
+        file = await self.get_file(file_id)
         if not file:
             return False
 
         await self.storage_service.delete_file(file.file_path)
 
-        self.db.delete(file)
-        self.db.commit()
+        await self.db.delete(file)
+        await self.db.commit()
 
         return True
@@ -11,6 +11,7 @@ from sqlalchemy import (
     func,
     JSON,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
 from app.sqla.database import Base
@@ -48,6 +49,8 @@ class Project(Base):
     )
 
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    # Users present at once, the configured default applies if not set
+    max_active_users: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="projects")
     files: Mapped[List["File"]] = relationship(
@@ -62,6 +65,11 @@ class Project(Base):
         back_populates="project", cascade="all, delete-orphan"
     )
 
+    # Matches the (created_at, id) keyset of the owner's project list
+    __table_args__ = (
+        Index("ix_projects_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
+
 
 class ProjectShare(Base):
     __tablename__ = "project_shares"
@@ -74,6 +82,11 @@ class ProjectShare(Base):
     project: Mapped["Project"] = relationship("Project", back_populates="shared_users")
     user: Mapped["User"] = relationship("User", back_populates="shared_projects")
 
+    # The primary key leads with project_id, lookups by user need their own index
+    __table_args__ = (
+        Index("ix_project_shares_user_id_project_id", "user_id", "project_id"),
+    )
+
 
 class File(Base):
     __tablename__ = "files"
@@ -202,3 +215,13 @@ class ChatMessage(Base):
     user: Mapped["User"] = relationship("User")
     project: Mapped["Project"] = relationship("Project")
     view: Mapped[Optional["View"]] = relationship("View")
+
+    # Chat history is paged per project by (created_at, id)
+    __table_args__ = (
+        Index(
+            "ix_chat_messages_project_id_created_at_id",
+            "project_id",
+            "created_at",
+            "id",
+        ),
+    )
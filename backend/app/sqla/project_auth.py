@@ -1,19 +1,28 @@
-from typing import Tuple
 from uuid import UUID
 
+import redis
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from starlette.status import HTTP_404_NOT_FOUND, HTTP_403_FORBIDDEN
 
+from app.redis.access import (
+    get_cached_project_role,
+    cache_project_role,
+    OWNER_ROLE,
+    SHARED_ROLE,
+    NO_ACCESS_ROLE,
+)
 from app.sqla.models import Project, ProjectShare
 
 
-def check_project_exists(db: Session, project_id: UUID) -> Project:
+async def check_project_exists(db: AsyncSession, project_id: UUID) -> Project:
     """
     Check if a project exists and return it.
     Raises 404 if not found.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
 
     if not project:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Project not found")
@@ -21,49 +30,123 @@ def check_project_exists(db: Session, project_id: UUID) -> Project:
     return project
 
 
-def check_user_project_access(
-    db: Session, project_id: UUID, user_id: int
-) -> Tuple[Project, bool]:
+async def load_project_role(db: AsyncSession, project_id: UUID, user_id: int) -> str:
     """
-    Check if a user has access to a project.
-    Returns tuple of (project, is_owner).
-    Raises 403 if no access.
+    Load the role of a user in a project with a single query.
+    Raises 404 if the project is not found.
     """
-    # Get the project
-    project = check_project_exists(db, project_id)
+    result = (
+        await db.execute(
+            select(
+                Project.owner_id,
+                exists()
+                .where(
+                    ProjectShare.project_id == Project.id,
+                    ProjectShare.user_id == user_id,
+                )
+                .label("is_shared"),
+            ).where(Project.id == project_id)
+        )
+    ).first()
 
-    # Check if user is owner
-    is_owner = project.owner_id == user_id
-
-    # Check if user has shared access
-    has_shared_access = False
-    if not is_owner:
-        shared_access = (
-            db.query(ProjectShare)
-            .filter(
-                ProjectShare.project_id == project_id, ProjectShare.user_id == user_id
+    if not result:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Project not found")
+
+    owner_id, is_shared = result
+    return _get_role(owner_id, is_shared, user_id)
+
+
+def _get_role(owner_id: int, is_shared: bool, user_id: int) -> str:
+    if owner_id == user_id:
+        return OWNER_ROLE
+    if is_shared:
+        return SHARED_ROLE
+    return NO_ACCESS_ROLE
+
+
+async def check_project_access(
+    db: AsyncSession, redis_client: redis.Redis, project_id: UUID, user_id: int
+) -> bool:
+    """
+    Check if a user has access to a project without loading it.
+    Roles are cached in Redis, so the common case costs no SQL round trip.
+    Returns whether the user is the owner.
+    Raises 404 if the project is not found, 403 if no access.
+    """
+    role = get_cached_project_role(redis_client, str(project_id), user_id)
+
+    if role is None:
+        role = await load_project_role(db, project_id, user_id)
+        cache_project_role(redis_client, str(project_id), user_id, role)
+
+    if role == NO_ACCESS_ROLE:
+        raise HTTPException(
+            status_code=HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project",
+        )
+
+    return role == OWNER_ROLE
+
+
+async def check_project_detail_access(
+    db: AsyncSession, redis_client: redis.Redis, project_id: UUID, user_id: int
+) -> Project:
+    """
+    Load a project with its owner, files and views in a single query,
+    checking on the way if a user has access to it.
+    The role found is cached, as in check_project_access.
+    Raises 404 if the project is not found, 403 if no access.
+    """
+    result = (
+        (
+            await db.execute(
+                select(
+                    Project,
+                    exists()
+                    .where(
+                        ProjectShare.project_id == Project.id,
+                        ProjectShare.user_id == user_id,
+                    )
+                    .label("is_shared"),
+                )
+                .options(
+                    joinedload(Project.user),
+                    joinedload(Project.files),
+                    joinedload(Project.views),
+                )
+                .where(Project.id == project_id)
             )
-            .first()
         )
-        has_shared_access = shared_access is not None
+        .unique()
+        .first()
+    )
+
+    if not result:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Project not found")
+
+    project, is_shared = result
+    role = _get_role(project.owner_id, is_shared, user_id)
+    cache_project_role(redis_client, str(project_id), user_id, role)
 
-    if not (is_owner or has_shared_access):
+    if role == NO_ACCESS_ROLE:
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="You don't have access to this project",
         )
 
-    return project, is_owner
+    return project
 
 
-def check_project_ownership(db: Session, project_id: UUID, user_id: int) -> Project:
+async def check_project_ownership(
+    db: AsyncSession, project_id: UUID, user_id: int
+) -> Project:
     """
     Check if a user is the owner of a project.
     Returns the project if successful.
     Raises 403 if not owner.
     """
     # Get the project
-    project = check_project_exists(db, project_id)
+    project = await check_project_exists(db, project_id)
 
     # Check if user is owner
     if project.owner_id != user_id:
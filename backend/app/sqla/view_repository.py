@@ -1,40 +1,40 @@
 from typing import List, Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.view_models import ViewCreate, SimpleTableViewCreate
 from app.sqla.models import View, SimpleTableView, File
 
 
 class ViewRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_project_views(self, project_id: str) -> List[View]:
+    async def get_project_views(self, project_id: str) -> List[View]:
         """Get all views for a project."""
         stmt = select(View).where(View.project_id == project_id)
-        return list(self.db.execute(stmt).scalars().all())
+        return list((await self.db.execute(stmt)).scalars().all())
 
-    def get_view(self, view_id: str) -> Optional[View]:
+    async def get_view(self, view_id: str) -> Optional[View]:
         """Get a specific view by ID."""
-        return self.db.get(View, view_id)
+        return await self.db.get(View, view_id)
 
-    def create_view(self, project_id: str, view_data: ViewCreate) -> View:
+    async def create_view(self, project_id: str, view_data: ViewCreate) -> View:
         """
         Factory method to create a view based on the view_type.
         This method dispatches to the appropriate create method.
         """
         if isinstance(view_data, SimpleTableViewCreate):
-            return self.create_simple_table_view(project_id, view_data)
+            return await self.create_simple_table_view(project_id, view_data)
         else:
             raise ValueError(f"Unsupported view type: {type(view_data)}")
 
-    def create_simple_table_view(
+    async def create_simple_table_view(
         self, project_id: str, view_data: SimpleTableViewCreate
     ) -> SimpleTableView:
         """Create a simple table view."""
-        file = self.db.get(File, view_data.file_id)
+        file = await self.db.get(File, view_data.file_id)
         if not file or str(file.project_id) != project_id:
             raise ValueError(
                 f"File {view_data.file_id} not found or does not belong to project {project_id}"
@@ -47,6 +47,6 @@ class ViewRepository:
         )
 
         self.db.add(view)
-        self.db.commit()
-        self.db.refresh(view)
+        await self.db.commit()
+        await self.db.refresh(view)
         return view
@@ -2,3 +2,70 @@ import os
 
 origins_str = os.getenv("ALLOWED_ORIGINS")
 allow_origins = origins_str.split(",")
+
+# How many times per second coalesced focus changes are flushed to Redis
+focus_flush_rate = float(os.getenv("FOCUS_FLUSH_RATE", "20"))
+
+# Limits of the outbound buffer of each WebSocket connection
+outbound_queue_size = int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", "256"))
+outbound_queue_bytes = int(os.getenv("WS_OUTBOUND_QUEUE_BYTES", str(1024 * 1024)))
+# Milliseconds outbound messages are collected into a single frame after a write
+outbound_batch_window_ms = int(os.getenv("WS_OUTBOUND_BATCH_WINDOW_MS", "16"))
+
+# Expose the /metrics endpoints
+metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+# Cache of authenticated users, keyed by token subject
+user_cache_ttl = float(os.getenv("USER_CACHE_TTL", "60"))
+user_cache_size = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+# Seconds a (user, project) access role stays cached in Redis
+project_access_cache_ttl = int(os.getenv("PROJECT_ACCESS_CACHE_TTL", "300"))
+
+# Seconds a serialized project detail stays cached in Redis
+project_detail_cache_ttl = int(os.getenv("PROJECT_DETAIL_CACHE_TTL", "300"))
+
+# Maximum number of bcrypt hashes computed at the same time
+password_hash_concurrency = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "4"))
+
+# Database connection pool, shared by all requests of a worker process
+db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Recycling already drops stale connections, a ping per checkout is opt-in
+db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
+# Chat messages kept per project in Redis, for clients resuming after a reconnect
+chat_stream_max_length = int(os.getenv("CHAT_STREAM_MAX_LENGTH", "1000"))
+# Maximum number of chat messages inserted into Postgres at once
+chat_persist_batch_size = int(os.getenv("CHAT_PERSIST_BATCH_SIZE", "500"))
+# Milliseconds between chat inserts, messages arriving in between share one INSERT
+chat_flush_interval_ms = int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "100"))
+
+# Project events kept in Redis, for clients resuming after a reconnect
+project_event_log_size = int(os.getenv("PROJECT_EVENT_LOG_SIZE", "500"))
+# Seconds the event log of an idle project is kept
+project_event_log_ttl = int(os.getenv("PROJECT_EVENT_LOG_TTL", "3600"))
+
+# Address the server listens on; reload restarts it on code changes, for development
+server_host = os.getenv("SERVER_HOST", "0.0.0.0")
+server_port = int(os.getenv("SERVER_PORT", "8000"))
+server_reload = os.getenv("SERVER_RELOAD", "false").lower() == "true"
+
+# permessage-deflate on WebSockets
+ws_compression_enabled = os.getenv("WS_COMPRESSION_ENABLED", "true").lower() == "true"
+# Frames smaller than this many bytes are sent uncompressed, e.g. presence events
+ws_compression_min_size = int(os.getenv("WS_COMPRESSION_MIN_SIZE", "256"))
+ws_compression_level = int(os.getenv("WS_COMPRESSION_LEVEL", "6"))
+# Smaller windows and memory levels cut the memory held per connection
+ws_compression_window_bits = int(os.getenv("WS_COMPRESSION_WINDOW_BITS", "12"))
+ws_compression_mem_level = int(os.getenv("WS_COMPRESSION_MEM_LEVEL", "5"))
+# Largest message accepted from a client, in bytes
+ws_max_size = int(os.getenv("WS_MAX_SIZE", str(1024 * 1024)))
+
+# Seconds between sweeps removing users of crashed workers from presence
+presence_sweep_interval = float(os.getenv("PRESENCE_SWEEP_INTERVAL", "5"))
+# Users present in a project at once, unless the project sets its own limit;
+# users connecting to a full project only watch, as spectators
+presence_max_users = int(os.getenv("PRESENCE_MAX_USERS", "50"))
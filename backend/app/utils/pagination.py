@@ -0,0 +1,27 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+
+def encode_cursor(created_at: datetime.datetime, item_id: UUID) -> str:
+    """Encode the sort key of the last item of a page into an opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), str(item_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises 400 if the cursor is malformed.
+    """
+    try:
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(created_at), UUID(item_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid cursor")
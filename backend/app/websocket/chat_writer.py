@@ -0,0 +1,214 @@
+import asyncio
+import contextlib
+import os
+import socket
+from datetime import datetime, timezone
+from typing import List, Tuple, Optional
+from uuid import UUID
+
+import redis
+from pydantic import BaseModel
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import (
+    DBAPIError,
+    InterfaceError,
+    InternalError,
+    OperationalError,
+)
+
+from app.redis.chat import (
+    create_chat_persist_group,
+    read_chat_persist_batch,
+    claim_stale_chat_persist_entries,
+    acknowledge_chat_persist_entries,
+)
+from app.redis.models import ChatMessageInfo
+from app.redis.storage import redis_context
+from app.sqla.database import SessionLocal
+from app.sqla.models import ChatMessage
+from app.utils.config import chat_persist_batch_size, chat_flush_interval_ms
+from app.websocket.logging import logger
+
+# Messages delivered to a writer that is gone are taken over after this time
+CLAIM_IDLE_TIME = 60_000  # milliseconds
+CLAIM_INTERVAL = 30  # seconds
+
+# Failures of the database rather than of the messages: batches are retried
+# until it is back, instead of being moved to the dead-letter stream
+TRANSIENT_ERRORS = (
+    OperationalError,
+    InterfaceError,
+    InternalError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class ChatWriterStats(BaseModel):
+    batches: int = 0
+    # Messages written to the database, and moved to the dead-letter stream
+    persisted: int = 0
+    dropped: int = 0
+    max_batch_size: int = 0
+    # Time from sending a message to its insert, for the last batch
+    last_lag_seconds: float = 0
+
+
+class ChatWriter:
+    """
+    Drains the chat persistence stream into Postgres in batches.
+    Every worker runs a writer in the same consumer group, so each message
+    is written once, and it is acknowledged only after its batch is committed.
+    Inserts ignore messages that already exist, so redelivery is harmless.
+    A message that can't be inserted is moved to a dead-letter stream,
+    so it doesn't hold back the messages after it.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = chat_persist_batch_size,
+        flush_interval_ms: int = chat_flush_interval_ms,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.stats = ChatWriterStats()
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.writer_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.writer_task is None or self.writer_task.done():
+            self.writer_task = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        if self.writer_task:
+            self.writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.writer_task
+            self.writer_task = None
+
+    async def _write_loop(self) -> None:
+        """Persist new messages as they arrive, recovering unfinished ones first"""
+        # Created in the loop, so the writer keeps retrying while Redis is down
+        group_created = False
+        # Messages read before a restart of this consumer come first
+        pending = True
+        loop = asyncio.get_running_loop()
+        next_claim_time = loop.time()
+
+        while True:
+            try:
+                async with redis_context() as redis_client:
+                    if not group_created:
+                        create_chat_persist_group(redis_client)
+                        group_created = True
+
+                    if loop.time() >= next_claim_time:
+                        next_claim_time = loop.time() + CLAIM_INTERVAL
+                        entries = claim_stale_chat_persist_entries(
+                            redis_client,
+                            self.consumer,
+                            CLAIM_IDLE_TIME,
+                            self.batch_size,
+                        )
+                        await self.persist(redis_client, entries)
+
+                    entries = read_chat_persist_batch(
+                        redis_client, self.consumer, self.batch_size, pending
+                    )
+                    await self.persist(redis_client, entries)
+
+                if pending and not entries:
+                    pending = False
+                elif len(entries) < self.batch_size:
+                    # Let messages accumulate into the next multi-row INSERT
+                    await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Chat writer error: {str(e)}")
+                # The stream and its group are gone, e.g. the key was deleted
+                if isinstance(e, redis.ResponseError) and "NOGROUP" in str(e):
+                    group_created = False
+                # Retry the messages that were read but not acknowledged
+                pending = True
+                await asyncio.sleep(self.flush_interval)
+
+    async def persist(self, redis_client, entries: List[Tuple[str, dict]]) -> None:
+        """Insert a batch of stream entries and acknowledge them"""
+        if not entries:
+            return
+
+        rows = []
+        dead_letters = []
+        for stream_id, fields in entries:
+            try:
+                info = ChatMessageInfo.model_validate_json(fields["data"])
+                project_id = UUID(fields["project_id"])
+            except (KeyError, ValueError):
+                logger.error(f"Dead-lettering malformed chat stream entry {stream_id}")
+                dead_letters.append((fields, "Malformed entry"))
+                continue
+
+            row = {
+                "id": info.message_id,
+                "user_id": info.user_id,
+                "project_id": project_id,
+                "content": info.content,
+                "view_id": info.view_id,
+                "created_at": info.created_at,
+            }
+            rows.append((fields, row))
+
+        if rows:
+            persisted = len(rows)
+            try:
+                await self._insert([row for _, row in rows])
+            except Exception as e:
+                if _is_transient(e):
+                    raise
+
+                # A bad message, e.g. of a deleted view, must not block the
+                # whole batch forever: insert one by one to find it
+                logger.warning(f"Chat batch insert failed, inserting one by one: {e}")
+                for fields, row in rows:
+                    try:
+                        await self._insert([row])
+                    except Exception as row_error:
+                        if _is_transient(row_error):
+                            raise
+                        logger.error(
+                            f"Dead-lettering chat message {row['id']}: {str(row_error)}"
+                        )
+                        dead_letters.append((fields, str(row_error)))
+                        persisted -= 1
+
+            self.stats.batches += 1
+            self.stats.persisted += persisted
+            self.stats.max_batch_size = max(self.stats.max_batch_size, len(rows))
+            oldest_created_at = min(row["created_at"] for _, row in rows)
+            self.stats.last_lag_seconds = (
+                datetime.now(timezone.utc) - oldest_created_at
+            ).total_seconds()
+
+        acknowledge_chat_persist_entries(
+            redis_client, [stream_id for stream_id, _ in entries], dead_letters
+        )
+        self.stats.dropped += len(dead_letters)
+
+    async def _insert(self, rows: List[dict]) -> None:
+        async with SessionLocal() as db:
+            await db.execute(
+                insert(ChatMessage)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[ChatMessage.id])
+            )
+            await db.commit()
+
+
+chat_writer = ChatWriter()
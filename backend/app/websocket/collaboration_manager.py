@@ -1,84 +1,120 @@
 import asyncio
-import contextlib
 import json
 from typing import Dict, Tuple, Set, List, Any, Optional
 from uuid import UUID
+
+import redis
 from fastapi import WebSocket
 from starlette.status import WS_1008_POLICY_VIOLATION
 
-from app.redis.storage import get_redis
+from app.redis.storage import redis_context
 from app.redis.users import (
     add_user_to_project,
-    remove_user_from_project,
-    heartbeat_user_presence,
-    PROJECT_CHANNEL,
+    register_user_connection,
+    unregister_user_connection,
+    refresh_users_presence,
 )
+from app.redis.events import PROJECT_CHANNEL
 from app.sqla.models import User
+from app.websocket.connection_writer import (
+    ConnectionWriter,
+    DeliveryStats,
+    OutboundMessage,
+)
+from app.utils.config import presence_max_users
+from app.websocket.encoding import JSON_ENCODING
+from app.websocket.focus_coalescer import focus_coalescer
 from app.websocket.logging import logger
 
 
 HEARTBEAT_INTERVAL = 10  # seconds
+SUBSCRIBE_TIMEOUT = 5  # seconds
 
 
 class CollaborationManager:
     def __init__(self):
         # Connection tracking
         self.active_connections: Dict[Tuple[UUID, int, str], WebSocket] = {}
-        self.heartbeat_tasks: Dict[Tuple[UUID, int, str], asyncio.Task] = {}
+        self.writers: Dict[Tuple[UUID, int, str], ConnectionWriter] = {}
+        self.heartbeat_task: Optional[asyncio.Task] = None
         self.redis_listeners: Dict[UUID, asyncio.Task] = {}
+        # Set once the listener of a project is subscribed to its channel
+        self.listeners_subscribed: Dict[UUID, asyncio.Event] = {}
 
-        # User tracking
-        self.project_users: Dict[UUID, Set[int]] = {}
-        self.connection_counts: Dict[Tuple[UUID, int], int] = {}
+        # Connection indexes: project -> connection keys, (project, user) -> connection keys
+        self.project_connections: Dict[UUID, Set[Tuple[UUID, int, str]]] = {}
+        self.user_connections: Dict[Tuple[UUID, int], Set[Tuple[UUID, int, str]]] = {}
 
-    @contextlib.asynccontextmanager
-    async def redis_client(self):
-        """Context manager for getting and cleaning up Redis client"""
-        redis_gen = get_redis()
-        try:
-            client = await redis_gen.__anext__()
-            yield client
-        finally:
-            await redis_gen.aclose()
+        # Delivery counters per project
+        self.delivery_stats: Dict[UUID, DeliveryStats] = {}
+
+        # Connections receiving updates without being part of presence
+        self.spectators: Set[Tuple[UUID, int, str]] = set()
+
+        # Topics of the current view of each connection, see set_interest
+        self.interests: Dict[Tuple[UUID, int, str], Set[Tuple[str, Any]]] = {}
+
+        # Users with presence connections and the user limit of their projects,
+        # to rejoin users removed from presence while still connected
+        self.presence_users: Dict[Tuple[UUID, int], User] = {}
+        self.max_users: Dict[UUID, int] = {}
 
     async def connect(
-        self, websocket: WebSocket, project_id: UUID, user: User, connection_id: str
-    ) -> None:
-        """ "Connect a user to a project and initialize their presence"""
-        await websocket.accept()
+        self,
+        websocket: WebSocket,
+        project_id: UUID,
+        user: User,
+        connection_id: str,
+        encoding: str = JSON_ENCODING,
+        subprotocol: Optional[str] = None,
+        max_users: int = presence_max_users,
+        spectator: bool = False,
+    ) -> bool:
+        """
+        Connect a user to a project and initialize their presence.
+        Project updates are queued for the connection, but not sent
+        until start_delivery is called with its initial state.
+        A spectator, or a user connecting to a project that already has
+        max_users present, only receives updates, without joining presence.
+        Returns whether the connection is a spectator.
+        """
+        await websocket.accept(subprotocol=subprotocol)
 
         connection_key = (project_id, user.id, connection_id)
-        user_project_key = (project_id, user.id)
 
         self.active_connections[connection_key] = websocket
+        self.writers[connection_key] = ConnectionWriter(
+            websocket,
+            connection_key,
+            stats=self.delivery_stats.setdefault(project_id, DeliveryStats()),
+            paused=True,
+            encoding=encoding,
+        )
+        self._index_connection(connection_key)
 
         try:
-            async with self.redis_client() as redis_client:
-                # Handle first connection for this user in this project
-                if user_project_key not in self.connection_counts:
-                    self.connection_counts[user_project_key] = 0
-                    await add_user_to_project(
-                        redis_client,
-                        str(project_id),
-                        user.id,
-                        user.username,
-                        user.avatar_url,
+            async with redis_context() as redis_client:
+                if not spectator:
+                    spectator = not await self._join_presence(
+                        redis_client, project_id, user, connection_id, max_users
                     )
 
-                # Increment connection count
-                self.connection_counts[user_project_key] += 1
-                logger.info(
-                    f"User {user.id} connection {connection_id} added to project {project_id}. "
-                    f"Total connections: {self.connection_counts[user_project_key]}"
-                )
-
-                # Track user in project
-                if project_id not in self.project_users:
-                    self.project_users[project_id] = set()
-                self.project_users[project_id].add(user.id)
+                if spectator:
+                    self.spectators.add(connection_key)
+                else:
+                    self.presence_users[(project_id, user.id)] = user
+                    self.max_users[project_id] = max_users
+                    logger.info(
+                        f"User {user.id} connection {connection_id} added to project {project_id} as a spectator"
+                    )
 
                 # Start heartbeat and Redis listener tasks
-                self._start_connection_tasks(project_id, user.id, connection_id)
+                self._start_connection_tasks(project_id)
+
+            # Updates published from now on reach the connection
+            await asyncio.wait_for(
+                self.listeners_subscribed[project_id].wait(), SUBSCRIBE_TIMEOUT
+            )
 
         except Exception as e:
             logger.error(
@@ -87,19 +123,98 @@ class CollaborationManager:
             await websocket.close(code=WS_1008_POLICY_VIOLATION, reason=str(e))
             raise
 
-    def _start_connection_tasks(
-        self, project_id: UUID, user_id: int, connection_id: str
+        return spectator
+
+    async def _join_presence(
+        self,
+        redis_client: redis.Redis,
+        project_id: UUID,
+        user: User,
+        connection_id: str,
+        max_users: int,
+    ) -> bool:
+        """
+        Register a connection in presence, adding the user on their first one.
+        Returns False if the project is full; the connection is not registered then.
+        """
+        # Connections are counted in Redis, shared by all workers
+        connection_count = await register_user_connection(
+            redis_client, str(project_id), user.id, connection_id
+        )
+
+        # Handle first connection for this user in this project
+        if connection_count == 1:
+            try:
+                joined = await add_user_to_project(
+                    redis_client,
+                    str(project_id),
+                    user.id,
+                    user.username,
+                    user.avatar_url,
+                    max_users,
+                )
+            except Exception:
+                await unregister_user_connection(
+                    redis_client, str(project_id), user.id, connection_id
+                )
+                raise
+
+            if not joined:
+                await unregister_user_connection(
+                    redis_client, str(project_id), user.id, connection_id
+                )
+                return False
+
+        logger.info(
+            f"User {user.id} connection {connection_id} added to project {project_id}. "
+            f"Total connections: {connection_count}"
+        )
+        return True
+
+    async def _rejoin_presence(
+        self, redis_client: redis.Redis, project_id: UUID, user_id: int
     ) -> None:
-        """Start heartbeat and Redis listener tasks for a connection"""
-        connection_key = (project_id, user_id, connection_id)
+        """
+        Add a user back to presence after they were swept while connected,
+        e.g. when a Redis stall outlasted the presence timeout.
+        If the project has filled up since, their connections become spectators.
+        """
+        user = self.presence_users.get((project_id, user_id))
+        if user is None:
+            return
 
-        # Start heartbeat task for this connection
-        self.heartbeat_tasks[connection_key] = asyncio.create_task(
-            self._heartbeat(project_id, user_id, connection_id)
+        joined = await add_user_to_project(
+            redis_client,
+            str(project_id),
+            user.id,
+            user.username,
+            user.avatar_url,
+            self.max_users.get(project_id, presence_max_users),
         )
+        if joined:
+            logger.info(f"User {user_id} rejoined presence of project {project_id}")
+            return
+
+        for connection_key in self.user_connections.get((project_id, user_id), ()):
+            if connection_key not in self.spectators:
+                await unregister_user_connection(
+                    redis_client, str(project_id), user_id, connection_key[2]
+                )
+                self.spectators.add(connection_key)
+        self.presence_users.pop((project_id, user_id), None)
+        logger.info(
+            f"User {user_id} could not rejoin full project {project_id}, now a spectator"
+        )
+
+    def _start_connection_tasks(self, project_id: UUID) -> None:
+        """Start heartbeat and Redis listener tasks if they are not running"""
+        # A single heartbeat task refreshes presence of all connected users
+        if self.heartbeat_task is None or self.heartbeat_task.done():
+            self.heartbeat_task = asyncio.create_task(self._heartbeat())
 
         # Start Redis listener for this project if it doesn't exist
         if project_id not in self.redis_listeners:
+            self.listeners_subscribed[project_id] = asyncio.Event()
             self.redis_listeners[project_id] = asyncio.create_task(
                 self._listen_for_updates(project_id)
             )
@@ -111,8 +226,8 @@ class CollaborationManager:
         Disconnect a user from a project
         If connection_id is provided, only that specific connection is removed
         If connection_id is None, all connections for this user in this project are removed
+        The user leaves presence once no worker holds a connection for them
         """
-        user_project_key = (project_id, user_id)
         connections_to_remove = self._get_connections_to_remove(
             project_id, user_id, connection_id
         )
@@ -121,21 +236,68 @@ class CollaborationManager:
         if not connections_to_remove:
             return
 
-        # Remove all identified connections and their tasks
+        # Spectators never joined presence, there is nothing to unregister
+        presence_connections = [
+            key for key in connections_to_remove if key not in self.spectators
+        ]
+
+        # Remove all identified connections and their writers
         for key in connections_to_remove:
             self._remove_connection(key)
 
-        # Update connection count and handle possible full disconnect
-        if user_project_key in self.connection_counts:
-            self.connection_counts[user_project_key] -= len(connections_to_remove)
-            remaining_count = self.connection_counts[user_project_key]
+        # If no more connections in project, clean up project resources
+        if project_id not in self.project_connections:
+            self._cleanup_project_resources(project_id)
 
-            if remaining_count <= 0:
-                await self._handle_user_full_disconnect(project_id, user_id)
-            else:
-                logger.info(
-                    f"User {user_id} still has {remaining_count} connections to project {project_id}"
-                )
+        if not presence_connections:
+            return
+
+        try:
+            async with redis_context() as redis_client:
+                for _, _, removed_connection_id in presence_connections:
+                    remaining_count = await unregister_user_connection(
+                        redis_client, str(project_id), user_id, removed_connection_id
+                    )
+        except Exception as e:
+            logger.error(
+                f"Error disconnecting user {user_id} from project {project_id}: {str(e)}"
+            )
+            return
+
+        if remaining_count == 0:
+            logger.info(
+                f"User {user_id} has no more connections to project {project_id}. Removed from presence."
+            )
+            focus_coalescer.discard(project_id, user_id)
+        else:
+            logger.info(
+                f"User {user_id} still has {remaining_count} connections to project {project_id}"
+            )
+
+    def _index_connection(self, connection_key: Tuple[UUID, int, str]) -> None:
+        """Add a connection to the per-project and per-user indexes"""
+        project_id, user_id, _ = connection_key
+
+        self.project_connections.setdefault(project_id, set()).add(connection_key)
+        self.user_connections.setdefault((project_id, user_id), set()).add(
+            connection_key
+        )
+
+    def _unindex_connection(self, connection_key: Tuple[UUID, int, str]) -> None:
+        """Remove a connection from the indexes, dropping empty entries"""
+        project_id, user_id, _ = connection_key
+        user_project_key = (project_id, user_id)
+
+        if project_id in self.project_connections:
+            self.project_connections[project_id].discard(connection_key)
+            if not self.project_connections[project_id]:
+                del self.project_connections[project_id]
+
+        if user_project_key in self.user_connections:
+            self.user_connections[user_project_key].discard(connection_key)
+            if not self.user_connections[user_project_key]:
+                del self.user_connections[user_project_key]
+                self.presence_users.pop(user_project_key, None)
 
     def _get_connections_to_remove(
         self, project_id: UUID, user_id: int, connection_id: str = None
@@ -143,155 +305,207 @@ class CollaborationManager:
         """Get list of connection keys that should be removed"""
         if connection_id is None:
             # Remove all connections for this user in this project
-            return [
-                key
-                for key in self.active_connections.keys()
-                if key[0] == project_id and key[1] == user_id
-            ]
+            return list(self.user_connections.get((project_id, user_id), ()))
         else:
             # Remove specific connection if it exists
             connection_key = (project_id, user_id, connection_id)
             return [connection_key] if connection_key in self.active_connections else []
 
     def _remove_connection(self, connection_key: Tuple[UUID, int, str]) -> None:
-        """Remove a specific connection and its associated tasks"""
+        """Remove a specific connection and its outbound writer"""
         if connection_key in self.active_connections:
             del self.active_connections[connection_key]
+        self.spectators.discard(connection_key)
+        self.interests.pop(connection_key, None)
+        self._unindex_connection(connection_key)
 
-        # Cancel associated heartbeat task
-        if connection_key in self.heartbeat_tasks:
-            self.heartbeat_tasks[connection_key].cancel()
-            del self.heartbeat_tasks[connection_key]
-
-    async def _handle_user_full_disconnect(
-        self, project_id: UUID, user_id: int
-    ) -> None:
-        """Handle operations when a user has no more connections to a project"""
-        user_project_key = (project_id, user_id)
-        logger.info(
-            f"User {user_id} has no more connections to project {project_id}. Removing from presence."
-        )
-
-        # Clean up tracking data
-        del self.connection_counts[user_project_key]
-
-        # Remove user from project users set
-        if (
-            project_id in self.project_users
-            and user_id in self.project_users[project_id]
-        ):
-            self.project_users[project_id].remove(user_id)
-
-            # If no more users in project, clean up project resources
-            if not self.project_users[project_id]:
-                self._cleanup_project_resources(project_id)
-
-        # Remove user from Redis presence
-        async with self.redis_client() as redis_client:
-            try:
-                await remove_user_from_project(redis_client, str(project_id), user_id)
-            except Exception as e:
-                logger.error(
-                    f"Error disconnecting user {user_id} from project {project_id}: {str(e)}"
-                )
+        # Stop the outbound writer
+        if connection_key in self.writers:
+            self.writers.pop(connection_key).close()
 
     def _cleanup_project_resources(self, project_id: UUID) -> None:
-        """Clean up resources for a project when no users remain"""
+        """Clean up resources for a project when no connections remain"""
         if project_id in self.redis_listeners:
             self.redis_listeners[project_id].cancel()
             del self.redis_listeners[project_id]
+            del self.listeners_subscribed[project_id]
+
+        if project_id in self.delivery_stats:
+            del self.delivery_stats[project_id]
 
-        if project_id in self.project_users:
-            del self.project_users[project_id]
+        self.max_users.pop(project_id, None)
 
-    async def broadcast_to_project(self, project_id: UUID, message: dict) -> None:
-        """Broadcast a message to all users in a project"""
-        if project_id not in self.project_users:
+    async def broadcast_to_project(
+        self, project_id: UUID, message: OutboundMessage
+    ) -> None:
+        """
+        Broadcast an already serialized message to all users in a project.
+        The message is queued on every connection without waiting for delivery.
+        Messages about a file or view skip connections on other views.
+        """
+        if project_id not in self.project_connections:
             return
 
-        json_message = json.dumps(message)
+        for connection_key in self.project_connections[project_id]:
+            if message.topic is not None:
+                interest = self.interests.get(connection_key)
+                if interest is not None and message.topic not in interest:
+                    self.delivery_stats[project_id].filtered += 1
+                    continue
+
+            self._send_to_connection(connection_key, message)
+
+    def set_interest(
+        self,
+        project_id: UUID,
+        user_id: int,
+        connection_id: str,
+        view_id: Optional[str],
+        file_id: Optional[int],
+    ) -> None:
+        """
+        Set the view a connection is on, so it only receives row updates of
+        its file and focus changes of its view.
+        Connections that haven't set a view yet receive every update.
+        """
+        connection_key = (project_id, user_id, connection_id)
+        if connection_key not in self.active_connections:
+            return
 
-        # Find and send to all connections in project
-        for user_id in self.project_users[project_id]:
-            connection_keys = [
-                key
-                for key in self.active_connections.keys()
-                if key[0] == project_id and key[1] == user_id
-            ]
+        self.interests[connection_key] = (
+            {("view", view_id), ("file", file_id)} if view_id is not None else set()
+        )
 
-            for connection_key in connection_keys:
-                await self._send_to_connection(connection_key, json_message)
+    def get_interest_view(
+        self, project_id: UUID, user_id: int, connection_id: str
+    ) -> Optional[str]:
+        """Get the view a connection is on, as set by set_interest"""
+        for kind, topic_id in self.interests.get(
+            (project_id, user_id, connection_id), ()
+        ):
+            if kind == "view":
+                return topic_id
+        return None
 
     async def send_message(self, project_id: UUID, user_id: int, message: dict) -> None:
         """Send a message to all connections of a specific user in a project"""
-        json_message = json.dumps(message)
+        outbound_message = OutboundMessage(
+            payload=json.dumps(message), event=message.get("event")
+        )
 
-        # Find all connections for this user in this project
-        connection_keys = [
-            key
-            for key in self.active_connections.keys()
-            if key[0] == project_id and key[1] == user_id
-        ]
+        for connection_key in self.user_connections.get((project_id, user_id), ()):
+            self._send_to_connection(connection_key, outbound_message)
 
-        # Send to each connection
-        for connection_key in connection_keys:
-            await self._send_to_connection(connection_key, json_message)
+    async def start_delivery(
+        self,
+        project_id: UUID,
+        user_id: int,
+        connection_id: str,
+        initial_messages: List[str],
+    ) -> None:
+        """
+        Send the initial state of a connection, then the updates queued since
+        it connected, so no update is delivered before the state it applies to.
+        """
+        writer = self.writers.get((project_id, user_id, connection_id))
+        if writer:
+            writer.resume([OutboundMessage.from_json(m) for m in initial_messages])
 
-    async def _send_to_connection(
-        self, connection_key: Tuple[UUID, int, str], json_message: str
+    async def send_to_connection(
+        self, project_id: UUID, user_id: int, connection_id: str, json_message: str
     ) -> None:
-        """Send a message to a specific connection with error handling"""
-        try:
-            await self.active_connections[connection_key].send_text(json_message)
-        except Exception as e:
-            logger.error(
-                f"Error sending message to user {connection_key[1]} connection {connection_key[2]}: {str(e)}"
-            )
+        """Send an already serialized message to a single connection"""
+        self._send_to_connection(
+            (project_id, user_id, connection_id),
+            OutboundMessage(payload=json_message),
+        )
 
-    async def _heartbeat(
-        self, project_id: UUID, user_id: int, connection_id: str
+    def _send_to_connection(
+        self, connection_key: Tuple[UUID, int, str], message: OutboundMessage
     ) -> None:
-        """Send heartbeat to keep user presence alive"""
-        try:
-            while True:
-                user_project_key = (project_id, user_id)
-
-                # Only send heartbeat if user still has connections
-                if (
-                    user_project_key in self.connection_counts
-                    and self.connection_counts[user_project_key] > 0
-                ):
-                    async with self.redis_client() as redis_client:
-                        await heartbeat_user_presence(
-                            redis_client, str(project_id), user_id
-                        )
+        """Queue a message on the outbound writer of a connection"""
+        writer = self.writers.get(connection_key)
+        if writer:
+            writer.send(message)
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Outbound queue depth and delivery counters per project"""
+        metrics = {}
+
+        for project_id, connection_keys in self.project_connections.items():
+            queue_depths = [
+                self.writers[key].queue_depth
+                for key in connection_keys
+                if key in self.writers
+            ]
+            stats = self.delivery_stats.get(project_id, DeliveryStats())
 
+            metrics[str(project_id)] = {
+                "connections": len(connection_keys),
+                "queue_depth": sum(queue_depths),
+                "max_queue_depth": max(queue_depths, default=0),
+                **stats.model_dump(),
+            }
+
+        return metrics
+
+    async def _heartbeat(self) -> None:
+        """
+        Keep presence of all connected users and their connections alive.
+        Each tick refreshes every live (project, user) pair in one Redis round trip.
+        Stops once the process has no connections left.
+        """
+        try:
+            while self.user_connections:
                 await asyncio.sleep(HEARTBEAT_INTERVAL)
 
+                try:
+                    await self.refresh_presence()
+                except Exception as e:
+                    logger.error(f"Heartbeat error: {str(e)}")
+
         except asyncio.CancelledError:
             pass
-        except Exception as e:
-            logger.error(
-                f"Heartbeat error for user {user_id} connection {connection_id}: {str(e)}"
+
+    async def refresh_presence(self) -> None:
+        """Refresh presence of all connected users, rejoining the ones swept meanwhile"""
+        project_connections: Dict[str, Dict[int, List[str]]] = {}
+        for (project_id, user_id), connection_keys in self.user_connections.items():
+            connection_ids = [
+                key[2] for key in connection_keys if key not in self.spectators
+            ]
+            if connection_ids:
+                project_connections.setdefault(str(project_id), {})[
+                    user_id
+                ] = connection_ids
+
+        if not project_connections:
+            return
+
+        async with redis_context() as redis_client:
+            missing_users = await refresh_users_presence(
+                redis_client, project_connections
             )
+            for project_id, user_ids in missing_users.items():
+                for user_id in user_ids:
+                    await self._rejoin_presence(redis_client, UUID(project_id), user_id)
 
     async def _listen_for_updates(self, project_id: UUID) -> None:
         """Listen for Redis updates for a project and broadcast them"""
-        async with self.redis_client() as redis_client:
+        async with redis_context() as redis_client:
             pubsub = None
             try:
                 pubsub = redis_client.pubsub()
                 pubsub.subscribe(PROJECT_CHANNEL.format(project_id=str(project_id)))
+                self.listeners_subscribed[project_id].set()
 
                 while True:
                     message = pubsub.get_message(ignore_subscribe_messages=True)
                     if message and message["type"] == "message":
-                        try:
-                            data = json.loads(message["data"])
-                            await self.broadcast_to_project(project_id, data)
-                        except json.JSONDecodeError:
-                            # Handle non-JSON messages if needed
-                            pass
+                        # Payloads are published as JSON, forward them as-is
+                        await self.broadcast_to_project(
+                            project_id, OutboundMessage.from_json(message["data"])
+                        )
                     await asyncio.sleep(0.01)  # Small sleep to prevent CPU hogging
 
             except asyncio.CancelledError:
@@ -0,0 +1,96 @@
+from typing import Any, Sequence, Tuple, List
+
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets.extensions.base import Extension
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+from websockets.frames import CTRL_OPCODES, Frame, Opcode
+from websockets.typing import ExtensionParameter
+
+from app.utils.config import (
+    ws_compression_enabled,
+    ws_compression_min_size,
+    ws_compression_level,
+    ws_compression_window_bits,
+    ws_compression_mem_level,
+)
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """
+    Per-Message Deflate that sends messages below a size threshold uncompressed.
+    Deflate adds its own overhead and CPU cost, which small presence
+    and heartbeat frames don't win back.
+    """
+
+    def __init__(self, *args: Any, min_size: int = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        # Whether the message being sent is left uncompressed
+        self.skipping = False
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+
+        # The decision is made on the first frame and kept for its continuations
+        if frame.opcode is not Opcode.CONT:
+            self.skipping = len(frame.data) < self.min_size
+
+        if self.skipping:
+            return frame
+
+        return super().encode(frame)
+
+
+class ThresholdPerMessageDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates Per-Message Deflate like the default factory, with a size threshold"""
+
+    def __init__(self, *args: Any, min_size: int = 0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+
+    def process_request_params(
+        self,
+        params: Sequence[ExtensionParameter],
+        accepted_extensions: Sequence[Extension],
+    ) -> Tuple[List[ExtensionParameter], PerMessageDeflate]:
+        response_params, extension = super().process_request_params(
+            params, accepted_extensions
+        )
+
+        return response_params, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+class CompressedWebSocketProtocol(WebSocketProtocol):
+    """
+    Uvicorn WebSocket protocol with configurable Per-Message Deflate.
+    Uvicorn enables it with zlib defaults only, which hold a large
+    compression window per connection and compress every frame.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+
+        self.available_extensions = []
+        if ws_compression_enabled:
+            self.available_extensions.append(
+                ThresholdPerMessageDeflateFactory(
+                    server_max_window_bits=ws_compression_window_bits,
+                    client_max_window_bits=ws_compression_window_bits,
+                    compress_settings={
+                        "level": ws_compression_level,
+                        "memLevel": ws_compression_mem_level,
+                    },
+                    min_size=ws_compression_min_size,
+                )
+            )
@@ -0,0 +1,288 @@
+import asyncio
+import json
+from collections import deque
+from typing import Tuple, Optional, Any, Deque, Dict, List, Union
+from uuid import UUID
+
+from fastapi import WebSocket
+from pydantic import BaseModel, PrivateAttr
+from starlette.status import WS_1013_TRY_AGAIN_LATER
+
+from app.utils.config import (
+    outbound_queue_size,
+    outbound_queue_bytes,
+    outbound_batch_window_ms,
+)
+from app.websocket.encoding import (
+    JSON_ENCODING,
+    encode_payload,
+    encode_batch,
+    send_payload,
+)
+from app.websocket.logging import logger
+
+CLOSE_TIMEOUT = 5  # seconds
+
+# Presence events: the oldest queued ones are dropped on overflow
+PRESENCE_EVENTS = {"user_joined", "user_left"}
+# Per-user state events: a newer event replaces a queued one of the same user
+COALESCED_EVENTS = {"user_focus_changed", "user_view_changed"}
+# Events only delivered to connections on a view of the same file, or on the same view
+FILE_EVENTS = {"row_update"}
+VIEW_EVENTS = {"user_focus_changed"}
+
+
+class OutboundMessage(BaseModel):
+    """An already serialized message with the metadata used for delivery policy"""
+
+    payload: str
+    event: Optional[str] = None
+    coalesce_key: Optional[Tuple[str, Any]] = None
+    # ("file", file_id) or ("view", view_id) of an event routed by interest
+    topic: Optional[Tuple[str, Any]] = None
+    # Payload converted to other wire encodings, shared by all connections
+    _encoded: Dict[str, Union[str, bytes]] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "OutboundMessage":
+        """Build a message from a JSON payload, reading only its delivery metadata"""
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            return cls(payload=payload)
+
+        event = data.get("event")
+        coalesce_key = (event, data.get("id")) if event in COALESCED_EVENTS else None
+
+        topic = None
+        if event in FILE_EVENTS and data.get("file_id") is not None:
+            topic = ("file", data["file_id"])
+        elif event in VIEW_EVENTS and data.get("view_id") is not None:
+            topic = ("view", data["view_id"])
+
+        return cls(payload=payload, event=event, coalesce_key=coalesce_key, topic=topic)
+
+    @property
+    def droppable(self) -> bool:
+        return self.event in PRESENCE_EVENTS or self.event in COALESCED_EVENTS
+
+    def encode(self, encoding: str) -> Union[str, bytes]:
+        """Get the payload in a wire encoding, converting it once per encoding"""
+        if encoding == JSON_ENCODING:
+            return self.payload
+
+        if encoding not in self._encoded:
+            self._encoded[encoding] = encode_payload(self.payload, encoding)
+        return self._encoded[encoding]
+
+
+class DeliveryStats(BaseModel):
+    """Delivery counters shared by all connections of a project"""
+
+    dropped: int = 0
+    coalesced: int = 0
+    slow_consumer_disconnects: int = 0
+    # Messages not sent to connections on other views
+    filtered: int = 0
+    # Messages written and the frames they were batched into
+    messages: int = 0
+    frames: int = 0
+
+
+class _Slot:
+    """Queue entry, tracked to find the queued state event of a user"""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: OutboundMessage):
+        self.message = message
+
+
+class ConnectionWriter:
+    """
+    Outbound side of a single WebSocket connection.
+    Messages are put into a bounded buffer and written by a dedicated task,
+    so a slow client never blocks the sender.
+
+    When the buffer is full:
+    - presence events evict the oldest droppable message (or are dropped),
+    - focus/view events are coalesced per user, so they never pile up,
+    - any other event disconnects the client, since it can't be skipped.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        connection_key: Tuple[UUID, int, str],
+        stats: Optional[DeliveryStats] = None,
+        max_queue_size: int = outbound_queue_size,
+        max_queue_bytes: int = outbound_queue_bytes,
+        paused: bool = False,
+        encoding: str = JSON_ENCODING,
+        batch_window_ms: int = outbound_batch_window_ms,
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.batch_window = batch_window_ms / 1000
+        self.connection_key = connection_key
+        self.stats = stats or DeliveryStats()
+        self.max_queue_size = max_queue_size
+        self.max_queue_bytes = max_queue_bytes
+
+        self.buffer: Deque[_Slot] = deque()
+        self.buffered_bytes = 0
+        self.coalesced_slots: Dict[Tuple[str, Any], _Slot] = {}
+        self.has_messages = asyncio.Event()
+        # Messages are queued but not written until the connection is resumed
+        self.resumed = asyncio.Event()
+        if not paused:
+            self.resumed.set()
+
+        self.closed = False
+        self.writer_task: Optional[asyncio.Task] = asyncio.create_task(self._write())
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.buffer)
+
+    def send(self, message: OutboundMessage) -> bool:
+        """
+        Queue a message without waiting, applying the overflow policy.
+        Returns False if the message was not queued.
+        """
+        if self.closed:
+            return False
+
+        # Replace a queued state event of the same user. The newer event
+        # takes the tail, so messages stay in sequence order
+        if message.coalesce_key is not None:
+            slot = self.coalesced_slots.get(message.coalesce_key)
+            if slot is not None:
+                self._discard(slot)
+                self.buffer.remove(slot)
+                self.stats.coalesced += 1
+
+        if self._is_full(message):
+            if not message.droppable:
+                self._drop_slow_consumer()
+                return False
+
+            if not self._evict_oldest_droppable():
+                self.stats.dropped += 1
+                return False
+
+        slot = _Slot(message)
+        self.buffer.append(slot)
+        self.buffered_bytes += len(message.payload)
+        if message.coalesce_key is not None:
+            self.coalesced_slots[message.coalesce_key] = slot
+
+        self.has_messages.set()
+        return True
+
+    def resume(self, initial_messages: List[OutboundMessage] = ()) -> None:
+        """
+        Start writing, sending the given messages before any queued one.
+        They bypass the overflow policy, since they must not be lost.
+        """
+        for message in reversed(initial_messages):
+            self.buffer.appendleft(_Slot(message))
+            self.buffered_bytes += len(message.payload)
+
+        self.resumed.set()
+        if self.buffer:
+            self.has_messages.set()
+
+    def close(self) -> None:
+        """Stop the writer task; queued messages are discarded"""
+        self.closed = True
+        self.buffer.clear()
+        self.coalesced_slots.clear()
+        self.buffered_bytes = 0
+
+        if self.writer_task:
+            self.writer_task.cancel()
+            self.writer_task = None
+
+    def _is_full(self, message: OutboundMessage) -> bool:
+        return (
+            len(self.buffer) >= self.max_queue_size
+            or self.buffered_bytes + len(message.payload) > self.max_queue_bytes
+        )
+
+    def _evict_oldest_droppable(self) -> bool:
+        """Remove the oldest presence or state message, if there is one"""
+        for slot in self.buffer:
+            if slot.message.droppable:
+                self._discard(slot)
+                self.buffer.remove(slot)
+                self.stats.dropped += 1
+                return True
+        return False
+
+    def _discard(self, slot: _Slot) -> None:
+        """Forget the bookkeeping of a slot leaving the buffer"""
+        self.buffered_bytes -= len(slot.message.payload)
+
+        coalesce_key = slot.message.coalesce_key
+        if coalesce_key is not None and self.coalesced_slots.get(coalesce_key) is slot:
+            del self.coalesced_slots[coalesce_key]
+
+    def _drop_slow_consumer(self) -> None:
+        """Disconnect a client that does not keep up with its messages"""
+        _, user_id, connection_id = self.connection_key
+        logger.warning(
+            f"Outbound buffer of user {user_id} connection {connection_id} is full, disconnecting"
+        )
+
+        self.stats.slow_consumer_disconnects += 1
+        self.close()
+        asyncio.create_task(self._close_websocket())
+
+    async def _close_websocket(self) -> None:
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(
+                    code=WS_1013_TRY_AGAIN_LATER, reason="Slow consumer"
+                ),
+                timeout=CLOSE_TIMEOUT,
+            )
+        except Exception:
+            pass
+
+    async def _write(self) -> None:
+        """
+        Write buffered messages to the socket, all of them in one frame.
+        A message arriving when the connection is idle is written right away;
+        after each frame, messages are collected for the batch window,
+        so bursts of updates are sent in a few frames.
+        """
+        try:
+            await self.resumed.wait()
+
+            while True:
+                await self.has_messages.wait()
+                self.has_messages.clear()
+
+                batch = []
+                while self.buffer:
+                    slot = self.buffer.popleft()
+                    self._discard(slot)
+                    batch.append(slot.message.encode(self.encoding))
+
+                if not batch:
+                    continue
+
+                await send_payload(self.websocket, encode_batch(batch, self.encoding))
+                self.stats.messages += len(batch)
+                self.stats.frames += 1
+
+                await asyncio.sleep(self.batch_window)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            _, user_id, connection_id = self.connection_key
+            logger.error(
+                f"Error sending message to user {user_id} connection {connection_id}: {str(e)}"
+            )
+            self.closed = True
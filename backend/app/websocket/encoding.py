@@ -0,0 +1,78 @@
+import json
+from typing import List, Optional, Tuple, Union
+
+import msgpack
+from fastapi import WebSocket, WebSocketDisconnect
+
+JSON_ENCODING = "json"
+# Binary frames, smaller and cheaper to parse for row updates and presence events
+MSGPACK_ENCODING = "msgpack"
+ENCODINGS = {JSON_ENCODING, MSGPACK_ENCODING}
+
+
+def negotiate_encoding(
+    websocket: WebSocket, encoding: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Choose the wire encoding of a WebSocket before accepting it.
+    A supported subprotocol requested by the client takes precedence over
+    the encoding query parameter; JSON is used by default.
+    Returns the encoding and the subprotocol to accept with, if any.
+    """
+    for subprotocol in websocket.scope.get("subprotocols", []):
+        if subprotocol in ENCODINGS:
+            return subprotocol, subprotocol
+
+    if encoding in ENCODINGS:
+        return encoding, None
+
+    return JSON_ENCODING, None
+
+
+def encode_payload(payload: str, encoding: str) -> Union[str, bytes]:
+    """Convert a serialized JSON message to the given wire encoding"""
+    if encoding == MSGPACK_ENCODING:
+        return msgpack.packb(json.loads(payload))
+    return payload
+
+
+def encode_batch(items: List[Union[str, bytes]], encoding: str) -> Union[str, bytes]:
+    """
+    Combine encoded messages into a single frame payload.
+    A single message is sent as is, several as an array of messages;
+    the array is assembled from the encoded items without encoding them again.
+    """
+    if len(items) == 1:
+        return items[0]
+
+    if encoding == MSGPACK_ENCODING:
+        return msgpack.Packer().pack_array_header(len(items)) + b"".join(items)
+    return "[" + ",".join(items) + "]"
+
+
+async def send_payload(websocket: WebSocket, data: Union[str, bytes]) -> None:
+    """Send an encoded message as a text or binary frame"""
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
+
+
+async def receive_message(websocket: WebSocket) -> Optional[dict]:
+    """
+    Receive a message sent as a JSON text frame or a msgpack binary frame.
+    Returns None if it can't be decoded.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+
+    try:
+        if message.get("bytes") is not None:
+            data = msgpack.unpackb(message["bytes"])
+        else:
+            data = json.loads(message["text"])
+    except (ValueError, TypeError):
+        return None
+
+    return data if isinstance(data, dict) else None
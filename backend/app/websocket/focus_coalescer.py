@@ -0,0 +1,76 @@
+import asyncio
+from typing import Dict, Tuple, Optional
+from uuid import UUID
+
+from app.redis.storage import redis_context
+from app.redis.users import update_user_focus
+from app.utils.config import focus_flush_rate
+from app.websocket.logging import logger
+
+
+class FocusCoalescer:
+    """
+    Collapses high-frequency focus changes into at most one Redis write
+    and publish per (project, user, view) every flush interval.
+    Only the latest focused row of each user on a view is kept between flushes.
+    """
+
+    def __init__(self, flush_rate: float = focus_flush_rate):
+        self.flush_interval = 1 / flush_rate
+        # Latest pending focus: (project_id, user_id, view_id) -> focused_row_id
+        self.pending: Dict[Tuple[UUID, int, Optional[str]], Optional[str]] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def submit(
+        self,
+        project_id: UUID,
+        user_id: int,
+        focused_row_id: Optional[str],
+        view_id: Optional[str] = None,
+    ) -> None:
+        """
+        Record the latest focus of a user, replacing any pending one.
+        The focus is published to the view of the connection it came from,
+        so tabs of the same user on different views don't replace each other.
+        """
+        self.pending[(project_id, user_id, view_id)] = focused_row_id
+
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
+
+    def discard(self, project_id: UUID, user_id: int) -> None:
+        """Drop pending focus changes, e.g. when the user leaves the project"""
+        for key in [key for key in self.pending if key[:2] == (project_id, user_id)]:
+            del self.pending[key]
+
+    async def _flush_loop(self) -> None:
+        """Flush pending focus changes at the configured rate until idle"""
+        try:
+            while self.pending:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Focus flush loop error: {str(e)}")
+
+    async def flush(self) -> None:
+        """Write and publish every pending focus change"""
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, {}
+
+        async with redis_context() as redis_client:
+            for (project_id, user_id, view_id), focused_row_id in batch.items():
+                try:
+                    await update_user_focus(
+                        redis_client, str(project_id), user_id, focused_row_id, view_id
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Error flushing focus of user {user_id} in project {project_id}: {str(e)}"
+                    )
+
+
+focus_coalescer = FocusCoalescer()
@@ -1,20 +1,35 @@
-from typing import Dict, Callable, Awaitable
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Callable, Awaitable, Optional
 from uuid import UUID
-import redis
 from fastapi import WebSocket
-from sqlalchemy.orm import Session
-
-from app.redis.models import HeartbeatAcknowledgmentEvent, ChatMessageInfo
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.redis.chat import broadcast_chat_message
+from app.redis.models import (
+    HeartbeatAcknowledgmentEvent,
+    ChatMessageInfo,
+    ViewSyncEvent,
+)
+from app.redis.projects import get_project_version
 from app.redis.users import (
     save_user_filter_sort,
-    heartbeat_user_presence,
     update_user_view,
-    update_user_focus,
+    get_active_users,
 )
-from app.redis.views import broadcast_chat_message
-from app.sqla.models import User, ChatMessage, View
+from app.redis.storage import redis_context
+from app.sqla.database import SessionLocal
+from app.sqla.models import User, View
+from app.websocket.collaboration_manager import collaboration_manager
+from app.websocket.focus_coalescer import focus_coalescer
 from app.websocket.logging import logger
 
+# Unknown views are looked up in the database at most this often, in seconds,
+# unless the project has changed
+VIEW_RELOAD_INTERVAL = 5
+
 
 class CollaborationMessageHandler:
     def __init__(
@@ -22,14 +37,20 @@ class CollaborationMessageHandler:
         websocket: WebSocket,
         project_id: UUID,
         user: User,
-        redis_client: redis.Redis,
-        db: Session,
+        connection_id: str,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
     ):
         self.websocket = websocket
         self.project_id = project_id
         self.user = user
-        self.redis_client = redis_client
-        self.db = db
+        self.connection_id = connection_id
+        # A session is checked out only while handling a message that needs it
+        self.session_factory = session_factory
+        # Views of the project by ID, so chat messages don't query them each time
+        self.views: Optional[Dict[str, View]] = None
+        # Project version and loop time of the last load of the views
+        self.views_version = 0
+        self.views_loaded_at = 0.0
 
     async def handle_message(self, message: dict):
         """Handle incoming WebSocket messages based on their type."""
@@ -52,7 +73,11 @@ class CollaborationMessageHandler:
             )
 
     async def __handle_chat_message(self, message: dict):
-        """Handle new chat message creation and broadcasting."""
+        """
+        Handle new chat message creation and broadcasting.
+        The message is appended to the chat stream of the project;
+        the chat writer persists it to the database in the background.
+        """
         try:
             content = message.get("content")
             view_id = message.get("view_id")
@@ -61,12 +86,9 @@ class CollaborationMessageHandler:
                 logger.warning(f"Empty chat message from user {self.user.id}")
                 return
 
+            view = None
             if view_id:
-                view = (
-                    self.db.query(View)
-                    .filter(View.id == view_id, View.project_id == self.project_id)
-                    .first()
-                )
+                view = await self.__get_view(str(view_id))
 
                 if not view:
                     logger.warning(
@@ -74,44 +96,60 @@ class CollaborationMessageHandler:
                     )
                     return
 
-            # Create the chat message in the database
-            chat_message = ChatMessage(
-                content=content.strip(),
-                user_id=self.user.id,
-                project_id=self.project_id,
-                view_id=view_id,
-            )
-
-            self.db.add(chat_message)
-            self.db.commit()
-            self.db.refresh(chat_message)
-
-            self.db.refresh(chat_message, ["user", "view"])
-
             # Create message info for broadcasting
             chat_message_info = ChatMessageInfo(
-                message_id=chat_message.id,
-                content=chat_message.content,
-                user_id=chat_message.user.id,
-                user_username=chat_message.user.username,
-                user_avatar_url=chat_message.user.avatar_url,
-                view_id=chat_message.view.id if chat_message.view else None,
-                view_name=chat_message.view.name if chat_message.view else None,
-                view_type=chat_message.view.view_type if chat_message.view else None,
-                view_file_id=chat_message.view.file_id if chat_message.view else None,
-                created_at=int(chat_message.created_at.timestamp()) * 1000,
+                message_id=uuid.uuid4(),
+                content=content.strip(),
+                user_id=self.user.id,
+                user_username=self.user.username,
+                user_avatar_url=self.user.avatar_url,
+                view_id=view.id if view else None,
+                view_name=view.name if view else None,
+                view_type=view.view_type if view else None,
+                view_file_id=view.file_id if view else None,
+                created_at=datetime.now(timezone.utc),
             )
 
             # Broadcast the message to all users in the project
-            broadcast_chat_message(
-                self.redis_client, chat_message_info, str(self.project_id)
-            )
+            async with redis_context() as redis_client:
+                broadcast_chat_message(
+                    redis_client, chat_message_info, str(self.project_id)
+                )
 
         except Exception as e:
             logger.error(
                 f"Error handling chat message from user {self.user.id}: {str(e)}"
             )
-            self.db.rollback()
+
+    async def __get_view(self, view_id: str) -> Optional[View]:
+        """
+        Get a view of the project from memory.
+        Views are reloaded when an unknown one is requested and the project
+        has changed since they were loaded, e.g. another user created a view,
+        or at most once per VIEW_RELOAD_INTERVAL otherwise,
+        so unknown ids sent by a client don't each cost a query.
+        """
+        if self.views is not None and view_id in self.views:
+            return self.views[view_id]
+
+        async with redis_context() as redis_client:
+            version = get_project_version(redis_client, str(self.project_id))
+
+        now = asyncio.get_running_loop().time()
+        if (
+            self.views is None
+            or version != self.views_version
+            or now - self.views_loaded_at >= VIEW_RELOAD_INTERVAL
+        ):
+            async with self.session_factory() as db:
+                views = await db.scalars(
+                    select(View).where(View.project_id == self.project_id)
+                )
+                self.views = {str(view.id): view for view in views}
+            self.views_version = version
+            self.views_loaded_at = now
+
+        return self.views.get(view_id)
 
     async def __handle_filter_sort_update_message(self, message: dict):
         """Handle filter/sort update messages"""
@@ -125,35 +163,74 @@ class CollaborationMessageHandler:
             )
             return
 
-        await save_user_filter_sort(
-            self.redis_client,
-            str(self.project_id),
-            view_id,
-            self.user.id,
-            filter_update,
-            sort_update,
-        )
+        async with redis_context() as redis_client:
+            await save_user_filter_sort(
+                redis_client,
+                str(self.project_id),
+                view_id,
+                self.user.id,
+                filter_update,
+                sort_update,
+            )
 
     async def __handle_heartbeat_message(self, message: dict):
-        """Handle heartbeat messages to keep the user presence alive."""
-        await heartbeat_user_presence(
-            self.redis_client, str(self.project_id), self.user.id
-        )
-
-        # Send acknowledgment back to client
+        """
+        Handle heartbeat messages from the client.
+        Presence of connected users is refreshed by the collaboration manager,
+        so only an acknowledgment is sent back.
+        """
         heartbeat_ack_event = HeartbeatAcknowledgmentEvent()
-        await self.websocket.send_text(heartbeat_ack_event.model_dump_json())
+        await collaboration_manager.send_to_connection(
+            self.project_id,
+            self.user.id,
+            self.connection_id,
+            heartbeat_ack_event.model_dump_json(),
+        )
 
     async def __handle_view_change_message(self, message: dict):
-        """Handle messages when a user changes their view."""
+        """
+        Handle messages when a user changes their view.
+        From now on the connection receives updates of the new view only,
+        so it is sent the current presence to catch up with.
+        """
         current_view_id = message.get("view_id")
-        await update_user_view(
-            self.redis_client, str(self.project_id), self.user.id, current_view_id
+        view = await self.__get_view(str(current_view_id)) if current_view_id else None
+
+        view_id = str(view.id) if view else None
+        file_id = view.file_id if view else None
+        collaboration_manager.set_interest(
+            self.project_id, self.user.id, self.connection_id, view_id, file_id
+        )
+
+        if current_view_id and view is None:
+            logger.warning(
+                f"Invalid view_id {current_view_id} in view change from user {self.user.id}"
+            )
+
+        # Only a view of the project is shown to others, an unknown one as no view
+        async with redis_context() as redis_client:
+            await update_user_view(
+                redis_client, str(self.project_id), self.user.id, view_id
+            )
+            active_users = await get_active_users(redis_client, str(self.project_id))
+
+        view_sync_event = ViewSyncEvent(
+            view_id=view_id, file_id=file_id, users=active_users
+        )
+        await collaboration_manager.send_to_connection(
+            self.project_id,
+            self.user.id,
+            self.connection_id,
+            view_sync_event.model_dump_json(),
         )
 
     async def __handle_focus_change_message(self, message: dict):
-        """Handle messages when a user changes their focus to a specific row."""
+        """
+        Handle messages when a user changes their focus to a specific row.
+        Focus changes are coalesced and flushed to Redis at a fixed rate.
+        """
         focused_row_id = message.get("row_id")
-        await update_user_focus(
-            self.redis_client, str(self.project_id), self.user.id, focused_row_id
+        view_id = collaboration_manager.get_interest_view(
+            self.project_id, self.user.id, self.connection_id
         )
+        focus_coalescer.submit(self.project_id, self.user.id, focused_row_id, view_id)
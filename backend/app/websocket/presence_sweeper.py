@@ -0,0 +1,48 @@
+import asyncio
+import contextlib
+from typing import Optional
+
+from app.redis.storage import redis_context
+from app.redis.users import sweep_stale_users
+from app.utils.config import presence_sweep_interval
+from app.websocket.logging import logger
+
+
+class PresenceSweeper:
+    """
+    Periodically removes users whose presence is no longer refreshed,
+    e.g. because the worker holding their connections crashed,
+    and lets the other clients know they left.
+    Every worker runs a sweeper; a user is removed by whichever comes first.
+    """
+
+    def __init__(self, interval: float = presence_sweep_interval):
+        self.interval = interval
+        self.sweeper_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.sweeper_task is None or self.sweeper_task.done():
+            self.sweeper_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self.sweeper_task:
+            self.sweeper_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.sweeper_task
+            self.sweeper_task = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with redis_context() as redis_client:
+                    removed = await sweep_stale_users(redis_client)
+                if removed:
+                    logger.info(f"Removed {removed} stale users from presence")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Presence sweeper error: {str(e)}")
+
+
+presence_sweeper = PresenceSweeper()
@@ -1,13 +1,13 @@
 import asyncio
-import contextlib
-import json
 from typing import Dict, Tuple, Set, List, Any, Optional
 from uuid import UUID
 from fastapi import WebSocket
 
 from app.redis.models import FilterSortUpdateEvent, SortModelItem
-from app.redis.storage import get_redis
+from app.redis.storage import redis_context
 from app.redis.users import get_user_filter_sort, SUBSCRIPTION_CHANNEL
+from app.websocket.connection_writer import OutboundMessage
+from app.websocket.encoding import JSON_ENCODING, send_payload
 from app.websocket.logging import logger
 
 
@@ -15,21 +15,13 @@ class SubscriptionManager:
     def __init__(self):
         # Connection key: (project_id, watcher_id, watched_id, view_id)
         self.active_connections: Dict[Tuple[UUID, int, int, str], WebSocket] = {}
+        # Wire encoding of each connection
+        self.encodings: Dict[Tuple[UUID, int, int, str], str] = {}
         # Reverse index: watched_user -> set of connection keys
         self.watched_index: Dict[Tuple[UUID, int], Set[Tuple[UUID, int, int, str]]] = {}
         # Redis listeners for each (project_id, view_id, user_id) combination
         self.redis_listeners: Dict[Tuple[UUID, str, int], asyncio.Task] = {}
 
-    @contextlib.asynccontextmanager
-    async def redis_client(self):
-        """Context manager for getting and cleaning up Redis client"""
-        redis_gen = get_redis()
-        try:
-            client = await redis_gen.__anext__()
-            yield client
-        finally:
-            await redis_gen.aclose()
-
     async def connect_subscription(
         self,
         websocket: WebSocket,
@@ -37,9 +29,11 @@ class SubscriptionManager:
         watcher_id: int,
         watched_id: int,
         view_id: Optional[str] = None,
+        encoding: str = JSON_ENCODING,
+        subprotocol: Optional[str] = None,
     ) -> bool:
         """Connect a subscription WebSocket for watching a specific user"""
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
 
         connection_key = (project_id, watcher_id, watched_id, view_id)
 
@@ -49,6 +43,7 @@ class SubscriptionManager:
             return False
 
         self.active_connections[connection_key] = websocket
+        self.encodings[connection_key] = encoding
 
         try:
             # Add to reverse index
@@ -62,7 +57,7 @@ class SubscriptionManager:
                 self._start_redis_listener(project_id, view_id, watched_id)
 
             # Send current filter/sort state
-            async with self.redis_client() as redis_client:
+            async with redis_context() as redis_client:
                 prefs = await get_user_filter_sort(
                     redis_client, str(project_id), view_id, watched_id
                 )
@@ -72,7 +67,8 @@ class SubscriptionManager:
                         filter_model=prefs.filter_model,
                         sort_model=prefs.sort_model,
                     )
-                    await websocket.send_text(update_event.model_dump_json())
+                    message = OutboundMessage(payload=update_event.model_dump_json())
+                    await send_payload(websocket, message.encode(encoding))
 
             return True
 
@@ -110,6 +106,7 @@ class SubscriptionManager:
 
         # Remove connection
         del self.active_connections[connection_key]
+        self.encodings.pop(connection_key, None)
 
         # Remove from reverse index
         watched_key = (project_id, watched_id)
@@ -161,7 +158,8 @@ class SubscriptionManager:
             filter_model=filter_model,
             sort_model=sort_model,
         )
-        json_message = update_event.model_dump_json()
+        # Serialized once, and converted once per encoding used by the watchers
+        message = OutboundMessage(payload=update_event.model_dump_json())
 
         # Notify all watchers
         for connection_key in self.watched_index[watched_key].copy():
@@ -169,10 +167,10 @@ class SubscriptionManager:
 
             # Only notify if watching all views or this specific view
             if watch_view_id is None or watch_view_id == view_id:
-                await self._send_to_connection(connection_key, json_message)
+                await self._send_to_connection(connection_key, message)
 
     async def _send_to_connection(
-        self, connection_key: Tuple[UUID, int, int, str], json_message: str
+        self, connection_key: Tuple[UUID, int, int, str], message: OutboundMessage
     ) -> None:
         """Send a message to a specific connection with error handling"""
         websocket = self.active_connections.get(connection_key)
@@ -180,7 +178,8 @@ class SubscriptionManager:
             return
 
         try:
-            await websocket.send_text(json_message)
+            encoding = self.encodings.get(connection_key, JSON_ENCODING)
+            await send_payload(websocket, message.encode(encoding))
         except Exception as e:
             project_id, watcher_id, watched_id, view_id = connection_key
             logger.error(
@@ -193,24 +192,25 @@ class SubscriptionManager:
             )
 
     async def broadcast_message(
-        self, project_id: UUID, view_id: str, user_id: int, data: dict
+        self, project_id: UUID, view_id: str, user_id: int, payload: str
     ):
+        """Forward an already serialized update to the watchers of a user"""
         watched_key = (project_id, user_id)
         if watched_key in self.watched_index:
-            json_message = json.dumps(data)
+            message = OutboundMessage(payload=payload)
 
             for connection_key in self.watched_index[watched_key].copy():
                 _, _, _, watch_view_id = connection_key
 
                 # Only notify if watching all views or this specific view
                 if watch_view_id is None or watch_view_id == view_id:
-                    await self._send_to_connection(connection_key, json_message)
+                    await self._send_to_connection(connection_key, message)
 
     async def _listen_for_updates(
         self, project_id: UUID, view_id: str, user_id: int
     ) -> None:
         """Listen for Redis updates for a project and broadcast them"""
-        async with self.redis_client() as redis_client:
+        async with redis_context() as redis_client:
             pubsub = None
             try:
                 pubsub = redis_client.pubsub()
@@ -223,14 +223,10 @@ class SubscriptionManager:
                 while True:
                     message = pubsub.get_message(ignore_subscribe_messages=True)
                     if message and message["type"] == "message":
-                        try:
-                            data = json.loads(message["data"])
-                            await self.broadcast_message(
-                                project_id, view_id, user_id, data
-                            )
-                        except json.JSONDecodeError:
-                            # Handle non-JSON messages if needed
-                            pass
+                        # Payloads are published as JSON, forward them as-is
+                        await self.broadcast_message(
+                            project_id, view_id, user_id, message["data"]
+                        )
                     await asyncio.sleep(0.01)  # Small sleep to prevent CPU hogging
 
             except asyncio.CancelledError:
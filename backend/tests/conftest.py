@@ -0,0 +1,134 @@
+import os
+from types import SimpleNamespace
+
+# Settings read at import time; Redis itself is replaced by fakeredis
+for name, value in {
+    "ALLOWED_ORIGINS": "http://localhost:3000",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "postgres",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+    "REDIS_PASSWORD": "",
+    "JWT_SECRET_KEY": "test",
+    "SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis
+import pytest
+
+import app.redis.storage as storage
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """A Redis server shared by every client, like the one all workers use"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        storage,
+        "redis_pool",
+        fakeredis.FakeRedis(server=server, decode_responses=True).connection_pool,
+    )
+    return server
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@pytest.fixture
+def make_manager(redis_server):
+    """Create collaboration managers standing for workers, on one fake Redis"""
+    from app.websocket.collaboration_manager import CollaborationManager
+
+    managers = []
+
+    def make():
+        manager = CollaborationManager()
+        managers.append(manager)
+        return manager
+
+    yield make
+
+    for manager in managers:
+        tasks = [manager.heartbeat_task, *manager.redis_listeners.values()]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+
+
+@pytest.fixture
+def collaboration_manager(redis_server):
+    """The manager of this worker, used by the message handlers"""
+    from app.websocket.collaboration_manager import collaboration_manager
+
+    yield collaboration_manager
+
+    tasks = [
+        collaboration_manager.heartbeat_task,
+        *collaboration_manager.redis_listeners.values(),
+    ]
+    for task in tasks:
+        if task is not None:
+            task.cancel()
+
+
+@pytest.fixture
+async def session_factory():
+    """Sessions of an in-memory SQLite database with the app schema"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from app.sqla.database import Base
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest.fixture
+async def project(session_factory):
+    """A project of user 1 with one file and a table view of it"""
+    from app.sqla.models import File, Project, SimpleTableView, User
+
+    async with session_factory() as db:
+        owner = User(username="owner", email="owner@example.com", hashed_password="x")
+        db.add(owner)
+        await db.flush()
+
+        project = Project(title="Project", owner_id=owner.id)
+        db.add(project)
+        await db.flush()
+
+        file = File(
+            project_id=project.id,
+            original_filename="data.csv",
+            storage_filename="data.csv",
+            file_path="./data.csv",
+            file_size=1,
+            file_type="csv",
+        )
+        db.add(file)
+        await db.flush()
+
+        view = SimpleTableView(project_id=project.id, name="Table", file_id=file.id)
+        db.add(view)
+        await db.commit()
+
+        return SimpleNamespace(
+            id=project.id, owner=owner, file_id=file.id, view_id=str(view.id)
+        )
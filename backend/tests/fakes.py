@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+
+class FakeWebSocket:
+    """Records what is sent to a client"""
+
+    def __init__(self):
+        self.sent = []
+        self.scope = {}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def make_user(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(id=user_id, username=f"user{user_id}", avatar_url=None)
+
+
+async def wait_for(condition, timeout: float = 1) -> None:
+    """Wait for messages to go through Redis pub/sub and the connection writers"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
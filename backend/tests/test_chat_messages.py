@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.auth.dependencies import get_current_user
+from app.main import app
+from app.sqla.database import get_db
+from app.sqla.models import ChatMessage
+
+pytestmark = pytest.mark.anyio
+
+# Several messages within the same second, one sharing a millisecond
+START = datetime(2026, 1, 1, 12, 0, 0, 100_000, tzinfo=timezone.utc)
+OFFSETS_US = [0, 250_000, 250_400, 600_000]
+
+
+@pytest.fixture
+async def client(redis_server, session_factory, project):
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_current_user] = lambda: project.owner
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def message_ids(session_factory, project):
+    ids = [uuid.uuid4() for _ in OFFSETS_US]
+    async with session_factory() as db:
+        db.add_all(
+            ChatMessage(
+                id=message_id,
+                user_id=project.owner.id,
+                project_id=project.id,
+                content=f"message {i}",
+                created_at=START + timedelta(microseconds=offset),
+            )
+            for i, (message_id, offset) in enumerate(zip(ids, OFFSETS_US))
+        )
+        await db.commit()
+    return [str(message_id) for message_id in ids]
+
+
+async def get_messages(client, project, **params):
+    response = await client.get(f"/projects/{project.id}/chat-messages", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_created_at_is_in_milliseconds(client, project, message_ids):
+    messages = await get_messages(client, project)
+
+    start_ms = int(START.timestamp() * 1000)
+    assert [m["createdAt"] - start_ms for m in messages] == [0, 250, 250, 600]
+
+
+async def test_since_returns_messages_after_its_millisecond(
+    client, project, message_ids
+):
+    messages = await get_messages(client, project)
+
+    missed = await get_messages(client, project, since=messages[0]["createdAt"])
+    assert [m["id"] for m in missed] == message_ids[1:]
+
+    missed = await get_messages(client, project, since=messages[1]["createdAt"])
+    assert [m["id"] for m in missed] == message_ids[3:]
+
+
+async def test_before_and_after_page_around_a_message(client, project, message_ids):
+    older = await get_messages(client, project, before=message_ids[2])
+    newer = await get_messages(client, project, after=message_ids[1])
+
+    assert [m["id"] for m in older] == message_ids[:2]
+    assert [m["id"] for m in newer] == message_ids[2:]
+
+
+@pytest.mark.parametrize("anchor", ["before", "after"])
+async def test_unknown_anchor_is_not_found(client, project, message_ids, anchor):
+    response = await client.get(
+        f"/projects/{project.id}/chat-messages", params={anchor: str(uuid.uuid4())}
+    )
+
+    assert response.status_code == 404
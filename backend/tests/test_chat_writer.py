@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+
+from app.redis.chat import (
+    CHAT_DEAD_LETTER_STREAM_KEY,
+    CHAT_PERSIST_GROUP,
+    CHAT_PERSIST_STREAM_KEY,
+    broadcast_chat_message,
+    claim_stale_chat_persist_entries,
+    create_chat_persist_group,
+    read_chat_persist_batch,
+)
+from app.redis.models import ChatMessageInfo
+from app.websocket.chat_writer import ChatWriter
+
+pytestmark = pytest.mark.anyio
+
+POISON = "\x00"
+
+
+class FakeDatabase:
+    """Stands for the chat insert, rejecting messages with a NUL byte like Postgres"""
+
+    def __init__(self):
+        self.rows = {}
+        self.down = False
+
+    async def insert(self, rows):
+        if self.down:
+            raise OperationalError("INSERT", {}, ConnectionRefusedError())
+        if any(POISON in row["content"] for row in rows):
+            raise DataError("INSERT", {}, ValueError("invalid byte sequence"))
+        self.rows.update((row["id"], row) for row in rows)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(ChatWriter, "_insert", lambda self, rows: database.insert(rows))
+    return database
+
+
+def send_chat_message(redis_client, project_id, content: str) -> uuid.UUID:
+    info = ChatMessageInfo(
+        message_id=uuid.uuid4(),
+        content=content,
+        user_id=1,
+        user_username="user1",
+        created_at=datetime.now(timezone.utc),
+    )
+    broadcast_chat_message(redis_client, info, str(project_id))
+    return info.message_id
+
+
+def pending_count(redis_client) -> int:
+    return redis_client.xpending(CHAT_PERSIST_STREAM_KEY, CHAT_PERSIST_GROUP)["pending"]
+
+
+async def test_poison_message_is_dead_lettered(redis_client, database):
+    project_id = uuid.uuid4()
+    writer = ChatWriter()
+    create_chat_persist_group(redis_client)
+    good = [send_chat_message(redis_client, project_id, f"hi {i}") for i in range(3)]
+    poison = send_chat_message(redis_client, project_id, f"bad {POISON}")
+    redis_client.xadd(CHAT_PERSIST_STREAM_KEY, {"project_id": "not a uuid"})
+
+    entries = read_chat_persist_batch(redis_client, writer.consumer, 10)
+    await writer.persist(redis_client, entries)
+
+    assert set(database.rows) == set(good)
+    assert pending_count(redis_client) == 0
+    assert redis_client.xlen(CHAT_PERSIST_STREAM_KEY) == 0
+
+    malformed, rejected = [
+        fields for _, fields in redis_client.xrange(CHAT_DEAD_LETTER_STREAM_KEY)
+    ]
+    assert malformed == {"project_id": "not a uuid", "error": "Malformed entry"}
+    assert str(poison) in rejected["data"]
+    assert "invalid byte sequence" in rejected["error"]
+
+    assert writer.stats.persisted == 3
+    assert writer.stats.dropped == 2
+
+
+async def test_messages_are_kept_while_database_is_down(redis_client, database):
+    project_id = uuid.uuid4()
+    writer = ChatWriter()
+    create_chat_persist_group(redis_client)
+    message_id = send_chat_message(redis_client, project_id, "hi")
+
+    database.down = True
+    entries = read_chat_persist_batch(redis_client, writer.consumer, 10)
+    with pytest.raises(OperationalError):
+        await writer.persist(redis_client, entries)
+
+    assert pending_count(redis_client) == 1
+    assert redis_client.xlen(CHAT_DEAD_LETTER_STREAM_KEY) == 0
+    assert writer.stats.persisted == writer.stats.dropped == 0
+
+    # The unacknowledged message is persisted once the database is back
+    database.down = False
+    entries = read_chat_persist_batch(redis_client, writer.consumer, 10, pending=True)
+    await writer.persist(redis_client, entries)
+
+    assert set(database.rows) == {message_id}
+    assert pending_count(redis_client) == 0
+    assert writer.stats.persisted == 1
+
+
+async def test_stale_entries_are_claimed(redis_client):
+    create_chat_persist_group(redis_client)
+    send_chat_message(redis_client, uuid.uuid4(), "hi")
+    read_chat_persist_batch(redis_client, "stopped-writer", 10)
+
+    entries = claim_stale_chat_persist_entries(redis_client, "live-writer", 0, 10)
+
+    assert len(entries) == 1
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+from websockets.frames import Frame, Opcode
+
+from app.utils.config import ws_compression_min_size
+from app.websocket.compression import ThresholdPerMessageDeflateFactory
+
+VIEW_ID = "5f3c2c1e-7f2a-4a51-9d9c-6f0a3e3b2a1d"
+
+INIT = json.dumps(
+    {
+        "event": "init",
+        "seq": 10,
+        "resumed": False,
+        "users": [
+            {
+                "id": i,
+                "username": f"user{i}",
+                "color": "#e64553",
+                "avatar_url": None,
+                "current_view_id": VIEW_ID,
+                "focused_row_id": None,
+            }
+            for i in range(6)
+        ],
+    }
+).encode()
+
+FOCUS = json.dumps(
+    {"event": "user_focus_changed", "id": 1, "focused_row_id": "abc", "seq": 11}
+).encode()
+
+
+@pytest.fixture
+def extensions():
+    client_factory = ClientPerMessageDeflateFactory()
+    server_factory = ThresholdPerMessageDeflateFactory(min_size=ws_compression_min_size)
+    response_params, server = server_factory.process_request_params(
+        client_factory.get_request_params(), []
+    )
+    client = client_factory.process_response_params(response_params, [])
+    return server, client
+
+
+def test_threshold_sits_between_presence_and_init_frames():
+    assert len(FOCUS) < ws_compression_min_size <= len(INIT)
+
+
+def test_large_frame_is_compressed(extensions):
+    server, client = extensions
+
+    frame = server.encode(Frame(Opcode.TEXT, INIT))
+
+    ratio = len(frame.data) / len(INIT)
+    print(f"init: {len(INIT)} -> {len(frame.data)} bytes ({ratio:.0%})")
+    assert frame.rsv1
+    assert ratio < 0.5
+    assert client.decode(frame).data == INIT
+
+
+def test_small_frame_is_sent_uncompressed(extensions):
+    server, client = extensions
+
+    frame = server.encode(Frame(Opcode.TEXT, FOCUS))
+
+    assert not frame.rsv1
+    assert frame.data == FOCUS
+    assert client.decode(frame).data == FOCUS
+
+
+def test_fragmented_message_keeps_first_frame_decision(extensions):
+    server, client = extensions
+    half = len(INIT) // 2
+
+    first = server.encode(Frame(Opcode.TEXT, INIT[:half], fin=False))
+    second = server.encode(Frame(Opcode.CONT, INIT[half:]))
+    small = server.encode(Frame(Opcode.TEXT, FOCUS))
+
+    assert first.rsv1 and not second.rsv1
+    decoded = client.decode(first).data + client.decode(second).data
+    assert decoded == INIT
+    assert not small.rsv1
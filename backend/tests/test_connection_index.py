@@ -0,0 +1,111 @@
+import time
+import uuid
+
+import pytest
+
+from app.websocket.collaboration_manager import CollaborationManager
+from app.websocket.connection_writer import DeliveryStats, OutboundMessage
+
+pytestmark = pytest.mark.anyio
+
+CONNECTIONS_PER_PROJECT = 10
+
+
+class NoScanDict(dict):
+    """Dict failing the test when all of its entries are iterated"""
+
+    def __iter__(self):
+        raise AssertionError("all connections were scanned")
+
+    def keys(self):
+        raise AssertionError("all connections were scanned")
+
+    def values(self):
+        raise AssertionError("all connections were scanned")
+
+    def items(self):
+        raise AssertionError("all connections were scanned")
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message: OutboundMessage) -> bool:
+        self.messages.append(message)
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+def make_manager(connection_count: int) -> CollaborationManager:
+    """A manager with connections spread over projects, one user per connection"""
+    manager = CollaborationManager()
+    manager.active_connections = NoScanDict()
+    manager.writers = NoScanDict()
+
+    for index in range(connection_count):
+        project_id = uuid.UUID(int=index // CONNECTIONS_PER_PROJECT)
+        connection_key = (project_id, index, f"connection-{index}")
+        manager.active_connections[connection_key] = object()
+        manager.writers[connection_key] = RecordingWriter()
+        manager._index_connection(connection_key)
+        manager.delivery_stats.setdefault(project_id, DeliveryStats())
+
+    return manager
+
+
+async def test_broadcast_only_touches_connections_of_the_project():
+    manager = make_manager(10_000)
+    project_id = uuid.UUID(int=3)
+
+    message = OutboundMessage.from_json('{"event": "user_joined", "id": 1}')
+    await manager.broadcast_to_project(project_id, message)
+
+    receivers = [
+        key
+        for key in manager.project_connections[project_id]
+        if manager.writers[key].messages == [message]
+    ]
+    assert len(receivers) == CONNECTIONS_PER_PROJECT
+    assert all(
+        not manager.writers[key].messages
+        for key in manager.project_connections[uuid.UUID(int=4)]
+    )
+
+
+def test_disconnect_lookup_uses_the_user_index():
+    manager = make_manager(10_000)
+    project_id = uuid.UUID(int=3)
+    connection_key = (project_id, 35, "connection-35")
+
+    assert manager._get_connections_to_remove(project_id, 35) == [connection_key]
+    assert manager._get_connections_to_remove(project_id, 35, "connection-35") == [
+        connection_key
+    ]
+
+    manager._remove_connection(connection_key)
+    assert (project_id, 35) not in manager.user_connections
+    assert connection_key not in manager.project_connections[project_id]
+
+
+async def best_broadcast_time(
+    manager: CollaborationManager, repeats: int = 200
+) -> float:
+    project_id = uuid.UUID(int=0)
+    message = OutboundMessage.from_json('{"event": "user_joined", "id": 1}')
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await manager.broadcast_to_project(project_id, message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def test_broadcast_time_does_not_grow_with_other_projects_connections():
+    small = await best_broadcast_time(make_manager(100))
+    large = await best_broadcast_time(make_manager(10_000))
+
+    # Same fan-out of 10 connections; a scan of all connections would be ~100x slower
+    assert large < small * 10
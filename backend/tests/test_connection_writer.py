@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import msgpack
+import pytest
+
+from app.websocket.connection_writer import ConnectionWriter, OutboundMessage
+from app.websocket.encoding import MSGPACK_ENCODING
+from tests.fakes import FakeWebSocket, wait_for
+
+pytestmark = pytest.mark.anyio
+
+BATCH_WINDOW_MS = 16
+# Scheduling delay allowed on top of the batch window
+LATENCY_SLACK = 0.05
+
+
+def event(**data) -> OutboundMessage:
+    return OutboundMessage.from_json(json.dumps(data))
+
+
+def frame_events(frame) -> list:
+    data = msgpack.unpackb(frame) if isinstance(frame, bytes) else json.loads(frame)
+    return data if isinstance(data, list) else [data]
+
+
+def sent_events(websocket: FakeWebSocket) -> list:
+    return [e for frame in websocket.sent for e in frame_events(frame)]
+
+
+async def test_coalesced_events_keep_sequence_order():
+    websocket = FakeWebSocket()
+    writer = ConnectionWriter(websocket, ("project", 1, "a"), paused=True)
+
+    writer.send(event(event="user_focus_changed", id=2, seq=5))
+    writer.send(event(event="row_update", seq=6))
+    writer.send(event(event="user_focus_changed", id=2, seq=7))
+    writer.resume()
+    await wait_for(lambda: websocket.sent)
+    writer.close()
+
+    assert [e["seq"] for e in sent_events(websocket)] == [6, 7]
+    assert writer.stats.coalesced == 1
+
+
+class TimedWebSocket(FakeWebSocket):
+    """Records when each frame is written"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent_at = []
+
+    async def send_bytes(self, data):
+        await super().send_bytes(data)
+        self.sent_at.append(asyncio.get_running_loop().time())
+
+    async def send_text(self, data):
+        await super().send_text(data)
+        self.sent_at.append(asyncio.get_running_loop().time())
+
+
+@pytest.mark.parametrize("encoding", ["json", MSGPACK_ENCODING])
+async def test_bursts_are_batched_within_the_window(encoding):
+    websocket = TimedWebSocket()
+    writer = ConnectionWriter(
+        websocket,
+        ("project", 1, "a"),
+        encoding=encoding,
+        batch_window_ms=BATCH_WINDOW_MS,
+    )
+    loop = asyncio.get_running_loop()
+
+    # 200 row updates, in bursts of 10 every 5 ms
+    queued_at = {}
+    for seq in range(200):
+        queued_at[seq] = loop.time()
+        writer.send(event(event="row_update", row_id=str(seq), value=seq, seq=seq))
+        if seq % 10 == 9:
+            await asyncio.sleep(0.005)
+
+    await wait_for(lambda: len(sent_events(websocket)) == 200)
+    writer.close()
+
+    latencies = []
+    for frame, sent_at in zip(websocket.sent, websocket.sent_at):
+        for e in frame_events(frame):
+            latencies.append(sent_at - queued_at[e["seq"]])
+
+    print(
+        f"{encoding}: 200 messages in {len(websocket.sent)} frames, "
+        f"max latency {max(latencies) * 1000:.1f} ms"
+    )
+    assert [e["seq"] for e in sent_events(websocket)] == list(range(200))
+    assert writer.stats.messages == 200
+    assert writer.stats.frames == len(websocket.sent) <= 20
+    assert max(latencies) < BATCH_WINDOW_MS / 1000 + LATENCY_SLACK
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.auth.dependencies import get_current_user
+from app.main import app
+import app.sqla.database as database
+from app.sqla.database import Base, MonitoredQueuePool, PoolStats, get_db
+from app.sqla.models import Project, User
+
+pytestmark = pytest.mark.anyio
+
+# Time every query takes in the database driver's thread
+SLOW_QUERY_SECONDS = 0.2
+CONCURRENT_REQUESTS = 10
+# Time a connection is held while another checkout waits for it
+HOLD_SECONDS = 0.1
+
+
+@pytest.fixture
+async def slow_database(tmp_path, redis_server):
+    """
+    A file database whose queries are slowed down in the driver's thread,
+    as a slow Postgres query would be, with the app using its sessions.
+    """
+    # Every session opens its own connection, with its own driver thread
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+    async with session_factory() as db:
+        owner = User(username="owner", email="owner@example.com", hashed_password="x")
+        db.add(owner)
+        await db.flush()
+        db.add_all(Project(title=f"Project {i}", owner_id=owner.id) for i in range(5))
+        await db.commit()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def slow_down_queries(dbapi_connection, connection_record):
+        dbapi_connection.run_async(
+            lambda connection: connection.set_trace_callback(
+                lambda statement: time.sleep(SLOW_QUERY_SECONDS)
+            )
+        )
+
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_current_user] = lambda: owner
+    yield
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+async def test_slow_queries_do_not_serialize_requests(slow_database):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Measure a single request, after a warm-up one
+        for _ in range(2):
+            start = time.perf_counter()
+            response = await client.get("/projects")
+            single_request_seconds = time.perf_counter() - start
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == 5
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get("/projects") for _ in range(CONCURRENT_REQUESTS))
+        )
+        elapsed = time.perf_counter() - start
+
+    assert all(response.status_code == 200 for response in responses)
+    print(
+        f"{CONCURRENT_REQUESTS / elapsed:.0f} requests/s concurrently, "
+        f"{1 / single_request_seconds:.0f} requests/s one at a time"
+    )
+    # Blocking queries would run the requests one after another
+    assert elapsed < CONCURRENT_REQUESTS * single_request_seconds / 3
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    """An engine whose monitored pool holds a single connection"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def test_pool_records_only_checkouts_that_wait(engine, monkeypatch):
+    stats = PoolStats()
+    monkeypatch.setattr(database, "pool_stats", stats)
+
+    # A free connection is checked out right away
+    for _ in range(5):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    assert stats.waits == 0
+    assert stats.total_wait_seconds == 0
+
+    async def hold_connection():
+        async with engine.connect():
+            await asyncio.sleep(HOLD_SECONDS)
+
+    async def wait_for_connection():
+        await asyncio.sleep(HOLD_SECONDS / 10)
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(hold_connection(), wait_for_connection())
+
+    assert stats.waits == 1
+    assert HOLD_SECONDS / 2 < stats.max_wait_seconds == stats.total_wait_seconds
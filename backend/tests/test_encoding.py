@@ -0,0 +1,79 @@
+import time
+import uuid
+
+import msgpack
+import pytest
+
+from app.redis.models import RowUpdateEvent, UserFocusChangedEvent, UserJoinedEvent
+from app.websocket import connection_writer
+from app.websocket.connection_writer import ConnectionWriter, OutboundMessage
+from app.websocket.encoding import MSGPACK_ENCODING, encode_payload
+from tests.fakes import FakeWebSocket, wait_for
+
+pytestmark = pytest.mark.anyio
+
+EVENTS = {
+    "row_update": RowUpdateEvent(
+        row_id=str(uuid.uuid4()),
+        column_name="price",
+        value=42.5,
+        row_version=3,
+        view_id=str(uuid.uuid4()),
+        file_id=7,
+    ),
+    "user_joined": UserJoinedEvent(id=12, username="alice", color="#04a5e5"),
+    "user_focus_changed": UserFocusChangedEvent(
+        id=12, focused_row_id=str(uuid.uuid4()), view_id=str(uuid.uuid4())
+    ),
+}
+
+
+@pytest.mark.parametrize("name", EVENTS)
+def test_msgpack_bytes_and_cpu_per_event(name):
+    model = EVENTS[name]
+    repeats = 2000
+
+    start = time.process_time()
+    for _ in range(repeats):
+        payload = model.model_dump_json()
+    json_seconds = (time.process_time() - start) / repeats
+
+    start = time.process_time()
+    for _ in range(repeats):
+        packed = encode_payload(payload, MSGPACK_ENCODING)
+    msgpack_seconds = (time.process_time() - start) / repeats
+
+    print(
+        f"{name}: {len(payload)} bytes as JSON, {len(packed)} as msgpack; "
+        f"{json_seconds * 1e6:.1f} us to serialize, "
+        f"{msgpack_seconds * 1e6:.1f} us more to convert"
+    )
+    assert msgpack.unpackb(packed) == model.model_dump(mode="json")
+    assert len(packed) < len(payload)
+
+
+async def test_broadcast_converts_once_per_encoding(monkeypatch):
+    conversions = 0
+
+    def counting_encode_payload(payload, encoding):
+        nonlocal conversions
+        conversions += 1
+        return encode_payload(payload, encoding)
+
+    monkeypatch.setattr(connection_writer, "encode_payload", counting_encode_payload)
+
+    websockets = [FakeWebSocket() for _ in range(50)]
+    writers = [
+        ConnectionWriter(websocket, ("project", i, "a"), encoding=MSGPACK_ENCODING)
+        for i, websocket in enumerate(websockets)
+    ]
+    message = OutboundMessage.from_json(EVENTS["row_update"].model_dump_json())
+    for writer in writers:
+        writer.send(message)
+
+    await wait_for(lambda: all(websocket.sent for websocket in websockets))
+    for writer in writers:
+        writer.close()
+
+    assert conversions == 1
+    assert all(websocket.sent == websockets[0].sent for websocket in websockets)
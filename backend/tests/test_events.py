@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from app.redis import events
+from app.redis.events import get_missed_project_events, publish_project_event
+
+PROJECT_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def publish_row_updates(redis_client, count: int) -> None:
+    for row_id in range(count):
+        payload = json.dumps(
+            {"event": "row_update", "file_id": 1, "row_id": row_id},
+            separators=(",", ":"),
+        )
+        publish_project_event(redis_client, PROJECT_ID, payload)
+
+
+@pytest.fixture
+def log_size(monkeypatch):
+    monkeypatch.setattr(events, "project_event_log_size", 100)
+    return 100
+
+
+def test_reconnect_replays_only_missed_events(redis_client, log_size):
+    publish_row_updates(redis_client, 200)
+
+    seq, missed = get_missed_project_events(redis_client, PROJECT_ID, 190)
+
+    assert seq == 200
+    assert [json.loads(event)["seq"] for event in missed] == list(range(191, 201))
+    assert [json.loads(event)["row_id"] for event in missed] == list(range(190, 200))
+
+    retained = redis_client.zrange(
+        events.PROJECT_EVENT_LOG_KEY.format(project_id=PROJECT_ID), 0, -1
+    )
+    replayed_bytes = sum(len(event) for event in missed)
+    print(f"{replayed_bytes} bytes replayed of {sum(map(len, retained))} retained")
+
+
+def test_up_to_date_client_gets_nothing_to_replay(redis_client, log_size):
+    publish_row_updates(redis_client, 20)
+
+    assert get_missed_project_events(redis_client, PROJECT_ID, 20) == (20, [])
+
+
+@pytest.mark.parametrize("last_seq", [None, 50, 250])
+def test_snapshot_is_needed_beyond_the_retained_window(
+    redis_client, log_size, last_seq
+):
+    # Events 101 to 200 are retained: a client at 50 missed 51 to 100,
+    # a client ahead of the project saw events from a previous log
+    publish_row_updates(redis_client, 200)
+
+    assert get_missed_project_events(redis_client, PROJECT_ID, last_seq) == (200, None)
+
+
+def test_oldest_retained_event_boundary(redis_client, log_size):
+    publish_row_updates(redis_client, 200)
+
+    # The client saw event 100; events 101 to 200 are all retained
+    seq, missed = get_missed_project_events(redis_client, PROJECT_ID, 100)
+    assert seq == 200 and len(missed) == log_size
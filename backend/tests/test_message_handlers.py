@@ -0,0 +1,99 @@
+import pytest
+
+from app.redis.projects import invalidate_project_detail
+from app.redis.users import get_active_users
+from app.sqla.models import SimpleTableView
+from app.websocket.message_handlers import CollaborationMessageHandler
+from tests.fakes import FakeWebSocket
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingSessionFactory:
+    """Session factory counting the sessions opened by the handler"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.sessions = 0
+
+    def __call__(self):
+        self.sessions += 1
+        return self.session_factory()
+
+
+@pytest.fixture
+def counting_session_factory(session_factory):
+    return CountingSessionFactory(session_factory)
+
+
+@pytest.fixture
+async def handler(project, counting_session_factory, collaboration_manager):
+    websocket = FakeWebSocket()
+    await collaboration_manager.connect(websocket, project.id, project.owner, "a")
+    await collaboration_manager.start_delivery(project.id, project.owner.id, "a", [])
+
+    yield CollaborationMessageHandler(
+        websocket,
+        project.id,
+        project.owner,
+        "a",
+        session_factory=counting_session_factory,
+    )
+
+    await collaboration_manager.disconnect(project.id, project.owner.id, "a")
+
+
+async def current_view(redis_client, project) -> str:
+    (user,) = await get_active_users(redis_client, str(project.id))
+    return user["current_view_id"]
+
+
+async def test_view_change_sets_view_and_interest(
+    handler, project, redis_client, collaboration_manager
+):
+    await handler.handle_message({"event": "view_change", "view_id": project.view_id})
+
+    assert await current_view(redis_client, project) == project.view_id
+    assert (
+        collaboration_manager.get_interest_view(project.id, project.owner.id, "a")
+        == project.view_id
+    )
+
+
+async def test_view_change_to_unknown_view_is_not_shown_to_others(
+    handler, project, redis_client, collaboration_manager
+):
+    await handler.handle_message({"event": "view_change", "view_id": project.view_id})
+    await handler.handle_message({"event": "view_change", "view_id": "forged"})
+
+    assert await current_view(redis_client, project) is None
+    assert (
+        collaboration_manager.get_interest_view(project.id, project.owner.id, "a")
+        is None
+    )
+
+
+async def test_unknown_views_do_not_query_the_database_each_time(
+    handler, project, redis_client, counting_session_factory
+):
+    await handler.handle_message({"event": "view_change", "view_id": project.view_id})
+    assert counting_session_factory.sessions == 1
+
+    for i in range(20):
+        await handler.handle_message(
+            {"event": "chat_message", "content": "hi", "view_id": f"forged-{i}"}
+        )
+    assert counting_session_factory.sessions == 1
+
+    # A view created meanwhile is found once the project version changes
+    async with counting_session_factory.session_factory() as db:
+        view = SimpleTableView(
+            project_id=project.id, name="New", file_id=project.file_id
+        )
+        db.add(view)
+        await db.commit()
+    invalidate_project_detail(redis_client, str(project.id))
+
+    await handler.handle_message({"event": "view_change", "view_id": str(view.id)})
+    assert counting_session_factory.sessions == 2
+    assert await current_view(redis_client, project) == str(view.id)
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.auth import password
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENCY = 2
+HASH_SECONDS = 0.1
+
+
+@pytest.fixture
+def password_pool(monkeypatch):
+    """A fresh hashing pool with a small concurrency limit"""
+    executor = ThreadPoolExecutor(max_workers=CONCURRENCY)
+    monkeypatch.setattr(password, "password_executor", executor)
+    monkeypatch.setattr(password, "password_semaphore", asyncio.Semaphore(CONCURRENCY))
+    monkeypatch.setattr(
+        password, "password_hashing_stats", password.PasswordHashingStats()
+    )
+    yield
+    executor.shutdown()
+
+
+class SlowHash:
+    """Stands for bcrypt: blocks its thread and records how many run at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, value: str) -> str:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(HASH_SECONDS)
+        with self.lock:
+            self.running -= 1
+        return value
+
+
+async def test_saturated_pool_caps_concurrency_and_records_queue_time(password_pool):
+    slow_hash = SlowHash()
+    stats = password.password_hashing_stats
+
+    # The event loop keeps running while every hashing slot is busy
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    calls = [
+        asyncio.create_task(password._run_in_password_pool(slow_hash, str(i)))
+        for i in range(3 * CONCURRENCY)
+    ]
+
+    await asyncio.sleep(HASH_SECONDS / 2)
+    assert stats.running == CONCURRENCY
+    assert stats.waiting == 2 * CONCURRENCY
+
+    results = await asyncio.gather(*calls)
+    ticker.cancel()
+
+    assert results == [str(i) for i in range(3 * CONCURRENCY)]
+    assert slow_hash.max_running == CONCURRENCY
+    assert stats.calls == 3 * CONCURRENCY
+    assert stats.waiting == 0 and stats.running == 0
+    # The last wave waited for the two waves before it
+    assert stats.max_queue_seconds >= 2 * HASH_SECONDS * 0.9
+    assert stats.total_queue_seconds >= CONCURRENCY * 3 * HASH_SECONDS * 0.9
+    assert ticks >= 10
+
+
+async def test_hash_and_verify_run_in_the_pool(password_pool):
+    hashed = await password.get_password_hash_async("secret")
+
+    assert await password.verify_password_async("secret", hashed)
+    assert not await password.verify_password_async("wrong", hashed)
+    assert password.password_hashing_stats.calls == 3
@@ -0,0 +1,59 @@
+import json
+import uuid
+
+import pytest
+
+from app.websocket.focus_coalescer import focus_coalescer
+from tests.fakes import FakeWebSocket, make_user, wait_for
+
+pytestmark = pytest.mark.anyio
+
+
+def received_events(websocket: FakeWebSocket, event: str) -> list:
+    """Events of a type sent to a client, unpacking batched frames"""
+    events = []
+    for frame in websocket.sent:
+        data = json.loads(frame)
+        events.extend(data if isinstance(data, list) else [data])
+    return [data for data in events if data.get("event") == event]
+
+
+async def connect(manager, project_id, user_id, connection_id, view_id, file_id):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, project_id, make_user(user_id), connection_id)
+    await manager.start_delivery(project_id, user_id, connection_id, [])
+    manager.set_interest(project_id, user_id, connection_id, view_id, file_id)
+    return websocket
+
+
+async def test_focus_is_routed_to_the_view_of_the_sending_tab(make_manager):
+    manager = make_manager()
+    project_id = uuid.uuid4()
+
+    # User 1 has a tab on each view, user 2 watches both views
+    await connect(manager, project_id, 1, "a", "view-a", 1)
+    await connect(manager, project_id, 1, "b", "view-b", 2)
+    watcher_a = await connect(manager, project_id, 2, "c", "view-a", 1)
+    watcher_b = await connect(manager, project_id, 2, "d", "view-b", 2)
+
+    for connection_id, row_id in (("a", "row-a"), ("b", "row-b")):
+        view_id = manager.get_interest_view(project_id, 1, connection_id)
+        focus_coalescer.submit(project_id, 1, row_id, view_id)
+    await focus_coalescer.flush()
+
+    await wait_for(
+        lambda: received_events(watcher_a, "user_focus_changed")
+        and received_events(watcher_b, "user_focus_changed")
+    )
+
+    assert [
+        (e["view_id"], e["focused_row_id"])
+        for e in received_events(watcher_a, "user_focus_changed")
+    ] == [("view-a", "row-a")]
+    assert [
+        (e["view_id"], e["focused_row_id"])
+        for e in received_events(watcher_b, "user_focus_changed")
+    ] == [("view-b", "row-b")]
+
+    for user_id, connection_id in ((1, "a"), (1, "b"), (2, "c"), (2, "d")):
+        await manager.disconnect(project_id, user_id, connection_id)
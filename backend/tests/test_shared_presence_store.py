@@ -0,0 +1,223 @@
+"""
+Presence state shared through Redis by several collaboration managers.
+The managers stand for workers but run in one process on one fake Redis,
+so this covers the shared store only, not pub/sub delivery between processes.
+"""
+
+import json
+import uuid
+
+import pytest
+
+from app.redis.events import PROJECT_EVENT_LOG_KEY
+from app.redis.users import (
+    USER_COLOR_SLOTS_KEY,
+    USER_CONNECTIONS_KEY,
+    USER_LIVENESS_KEY,
+    USER_PRESENCE_KEY,
+    CONNECTION_TIMEOUT,
+    PRESENCE_TIMEOUT,
+    get_active_users,
+    get_color,
+    sweep_stale_users,
+)
+
+from tests.fakes import FakeWebSocket, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+def presence_events(redis_client, project_id: uuid.UUID) -> list:
+    """Join and leave events published for a project, in order"""
+    log = redis_client.zrange(
+        PROJECT_EVENT_LOG_KEY.format(project_id=project_id), 0, -1
+    )
+    events = [json.loads(event) for event in log]
+    return [
+        (event["event"], event["id"])
+        for event in events
+        if event["event"] in ("user_joined", "user_left")
+    ]
+
+
+async def test_user_connected_to_two_managers_joins_and_leaves_once(
+    redis_client, make_manager
+):
+    first_worker, second_worker = make_manager(), make_manager()
+    project_id = uuid.uuid4()
+    user = make_user(1)
+
+    await first_worker.connect(FakeWebSocket(), project_id, user, "a")
+    await second_worker.connect(FakeWebSocket(), project_id, user, "b")
+
+    assert [u["id"] for u in await get_active_users(redis_client, str(project_id))] == [
+        1
+    ]
+    assert presence_events(redis_client, project_id) == [("user_joined", 1)]
+
+    # The user stays present while another worker holds a connection
+    await first_worker.disconnect(project_id, user.id, "a")
+    assert redis_client.hexists(USER_PRESENCE_KEY.format(project_id=project_id), "1")
+    assert presence_events(redis_client, project_id) == [("user_joined", 1)]
+
+    await second_worker.disconnect(project_id, user.id, "b")
+    assert not redis_client.hexists(
+        USER_PRESENCE_KEY.format(project_id=project_id), "1"
+    )
+    assert not redis_client.exists(USER_COLOR_SLOTS_KEY.format(project_id=project_id))
+    assert presence_events(redis_client, project_id) == [
+        ("user_joined", 1),
+        ("user_left", 1),
+    ]
+
+
+async def test_stale_connection_of_stopped_manager_does_not_keep_user_present(
+    redis_client, make_manager
+):
+    dead_worker, live_worker = make_manager(), make_manager()
+    project_id = uuid.uuid4()
+    user = make_user(1)
+
+    await dead_worker.connect(FakeWebSocket(), project_id, user, "a")
+    await live_worker.connect(FakeWebSocket(), project_id, user, "b")
+
+    # The first worker stops refreshing its connection without unregistering it
+    connections_key = USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=1)
+    stale_time = redis_client.time()[0] - CONNECTION_TIMEOUT - 1
+    redis_client.zadd(connections_key, {"a": stale_time})
+
+    await live_worker.disconnect(project_id, user.id, "b")
+
+    assert not redis_client.hexists(
+        USER_PRESENCE_KEY.format(project_id=project_id), "1"
+    )
+    assert presence_events(redis_client, project_id) == [
+        ("user_joined", 1),
+        ("user_left", 1),
+    ]
+
+
+async def test_user_cap_is_shared_by_managers(redis_client, make_manager):
+    first_worker, second_worker = make_manager(), make_manager()
+    project_id = uuid.uuid4()
+
+    assert not await first_worker.connect(
+        FakeWebSocket(), project_id, make_user(1), "a", max_users=1
+    )
+    # The project is full, so a user connecting to another worker only spectates
+    assert await second_worker.connect(
+        FakeWebSocket(), project_id, make_user(2), "b", max_users=1
+    )
+    assert not redis_client.exists(
+        USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=2)
+    )
+
+    # The spectator leaving doesn't affect presence
+    await second_worker.disconnect(project_id, 2, "b")
+    assert presence_events(redis_client, project_id) == [("user_joined", 1)]
+
+    await first_worker.disconnect(project_id, 1, "a")
+    assert not await second_worker.connect(
+        FakeWebSocket(), project_id, make_user(2), "c", max_users=1
+    )
+    assert presence_events(redis_client, project_id) == [
+        ("user_joined", 1),
+        ("user_left", 1),
+        ("user_joined", 2),
+    ]
+
+    await second_worker.disconnect(project_id, 2, "c")
+
+
+async def test_color_slots_are_unique_across_managers(redis_client, make_manager):
+    first_worker, second_worker = make_manager(), make_manager()
+    project_id = uuid.uuid4()
+
+    await first_worker.connect(FakeWebSocket(), project_id, make_user(1), "a")
+    await second_worker.connect(FakeWebSocket(), project_id, make_user(2), "b")
+    await first_worker.disconnect(project_id, 1, "a")
+    # The freed slot is reused by the next user
+    await second_worker.connect(FakeWebSocket(), project_id, make_user(3), "c")
+
+    colors = {
+        user["id"]: user["color"]
+        for user in await get_active_users(redis_client, str(project_id))
+    }
+    assert set(colors) == {2, 3}
+    assert colors[2] == get_color(1)
+    assert colors[3] == get_color(0)
+
+    for user_id, connection_id in ((2, "b"), (3, "c")):
+        await second_worker.disconnect(project_id, user_id, connection_id)
+
+
+def expire_liveness(redis_client, project_id: uuid.UUID, user_id: int) -> None:
+    """Make a user look like they stopped refreshing presence, e.g. during a stall"""
+    stale_time = redis_client.time()[0] - PRESENCE_TIMEOUT - 1
+    redis_client.zadd(
+        USER_LIVENESS_KEY.format(project_id=project_id), {str(user_id): stale_time}
+    )
+
+
+async def test_user_swept_while_connected_rejoins_on_heartbeat(
+    redis_client, make_manager
+):
+    worker = make_manager()
+    project_id = uuid.uuid4()
+    user = make_user(1)
+
+    await worker.connect(FakeWebSocket(), project_id, user, "a")
+    expire_liveness(redis_client, project_id, 1)
+    assert await sweep_stale_users(redis_client) == 1
+    assert await get_active_users(redis_client, str(project_id)) == []
+
+    await worker.refresh_presence()
+
+    assert [u["id"] for u in await get_active_users(redis_client, str(project_id))] == [
+        1
+    ]
+    assert presence_events(redis_client, project_id) == [
+        ("user_joined", 1),
+        ("user_left", 1),
+        ("user_joined", 1),
+    ]
+
+    # Another tab of the user keeps them present
+    await worker.connect(FakeWebSocket(), project_id, user, "b")
+    await worker.disconnect(project_id, 1, "a")
+    assert [u["id"] for u in await get_active_users(redis_client, str(project_id))] == [
+        1
+    ]
+
+    await worker.disconnect(project_id, 1, "b")
+    assert await get_active_users(redis_client, str(project_id)) == []
+
+
+async def test_user_swept_from_full_project_becomes_spectator(
+    redis_client, make_manager
+):
+    first_worker, second_worker = make_manager(), make_manager()
+    project_id = uuid.uuid4()
+
+    await first_worker.connect(
+        FakeWebSocket(), project_id, make_user(1), "a", max_users=1
+    )
+    expire_liveness(redis_client, project_id, 1)
+    await sweep_stale_users(redis_client)
+    # Another user takes the free place before the heartbeat
+    await second_worker.connect(
+        FakeWebSocket(), project_id, make_user(2), "b", max_users=1
+    )
+
+    await first_worker.refresh_presence()
+
+    assert [u["id"] for u in await get_active_users(redis_client, str(project_id))] == [
+        2
+    ]
+    assert (project_id, 1, "a") in first_worker.spectators
+    assert not redis_client.exists(
+        USER_CONNECTIONS_KEY.format(project_id=project_id, user_id=1)
+    )
+
+    await first_worker.disconnect(project_id, 1, "a")
+    await second_worker.disconnect(project_id, 2, "b")
@@ -0,0 +1,55 @@
+import uuid
+
+import msgpack
+import pytest
+
+from app.redis.models import FilterSortUpdateEvent
+from app.redis.users import SUBSCRIPTION_CHANNEL, save_user_filter_sort
+from app.websocket.encoding import MSGPACK_ENCODING
+from app.websocket.subscription_manager import SubscriptionManager
+from tests.fakes import FakeWebSocket, wait_for
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def subscription_manager(redis_server):
+    manager = SubscriptionManager()
+    yield manager
+    for task in manager.redis_listeners.values():
+        task.cancel()
+
+
+async def test_updates_are_forwarded_without_serializing_again(
+    subscription_manager, redis_client
+):
+    project_id = uuid.uuid4()
+    json_watcher, msgpack_watcher = FakeWebSocket(), FakeWebSocket()
+
+    await subscription_manager.connect_subscription(
+        json_watcher, project_id, 2, 1, "view"
+    )
+    await subscription_manager.connect_subscription(
+        msgpack_watcher, project_id, 3, 1, "view", encoding=MSGPACK_ENCODING
+    )
+    channel = SUBSCRIPTION_CHANNEL.format(
+        project_id=str(project_id), view_id="view", user_id=1
+    )
+    await wait_for(lambda: redis_client.pubsub_numsub(channel)[0][1] == 1)
+
+    await save_user_filter_sort(
+        redis_client, str(project_id), "view", 1, {"items": []}, []
+    )
+    await wait_for(lambda: json_watcher.sent and msgpack_watcher.sent)
+
+    published = FilterSortUpdateEvent(
+        view_id="view", filter_model={"items": []}, sort_model=[]
+    ).model_dump_json()
+    # The published payload is sent as is, not parsed and dumped again
+    assert json_watcher.sent == [published]
+    assert msgpack.unpackb(msgpack_watcher.sent[0]) == {
+        "event": "filter_sort_update",
+        "view_id": "view",
+        "filter_model": {"items": []},
+        "sort_model": [],
+    }
@@ -149,6 +149,8 @@ export interface ChatTabProps {
   messages: ChatMessageViewModel[];
   onViewClicked: (view: ViewViewModel) => void;
   onSendMessage: (message: string) => void;
+  hasOlderMessages?: boolean;
+  onLoadOlderMessages?: () => void;
 }
 
 /**
@@ -159,11 +161,21 @@ export default function ChatTab({
   messages,
   onViewClicked,
   onSendMessage,
+  hasOlderMessages = false,
+  onLoadOlderMessages,
 }: ChatTabProps) {
   return (
     <div className="flex flex-col space-y-4 h-full">
       <h1 className="text-xl flex-none font-medium">Chat</h1>
       <div className="flex-1 space-y-4">
+        {hasOlderMessages && onLoadOlderMessages && (
+          <button
+            onClick={onLoadOlderMessages}
+            className="w-full text-xs text-muted-foreground hover:text-foreground transition-colors cursor-pointer"
+          >
+            Load older messages
+          </button>
+        )}
         {messages.map((message) => {
           return (
             <ChatBubble
@@ -93,14 +93,16 @@ export async function getUserClient(): Promise<UserViewModel | undefined> {
 export interface ListProjectsRequest {
   page?: number;
   pageSize?: number;
+  cursor?: string;
 }
 
 export async function listProjects({
   page,
   pageSize,
+  cursor,
 }: ListProjectsRequest): Promise<PaginatedResponse<ProjectViewModel>> {
   const response = await fetch(
-    `${getApiUrl()}/projects${buildQueryString({ page, pageSize })}`,
+    `${getApiUrl()}/projects${buildQueryString({ page, pageSize, cursor })}`,
     {
       method: "GET",
       credentials: "include",
@@ -118,9 +120,10 @@ export async function listProjects({
 export async function listSharedProjects({
   page,
   pageSize,
+  cursor,
 }: ListProjectsRequest): Promise<PaginatedResponse<ProjectViewModel>> {
   const response = await fetch(
-    `${getApiUrl()}/projects/shared${buildQueryString({ page, pageSize })}`,
+    `${getApiUrl()}/projects/shared${buildQueryString({ page, pageSize, cursor })}`,
     {
       method: "GET",
       credentials: "include",
@@ -432,11 +435,19 @@ export async function getViewSortModel(
   return response.json();
 }
 
+export interface ListChatMessagesRequest {
+  before?: string;
+  after?: string;
+  since?: number;
+  limit?: number;
+}
+
 export async function listChatMessages(
   projectId: string,
+  { before, after, since, limit }: ListChatMessagesRequest = {},
 ): Promise<ChatMessageViewModel[]> {
   const response = await fetch(
-    `${getApiUrl()}/projects/${projectId}/chat-messages`,
+    `${getApiUrl()}/projects/${projectId}/chat-messages${buildQueryString({ before, after, since, limit })}`,
     {
       method: "GET",
       credentials: "include",
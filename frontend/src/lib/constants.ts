@@ -1,5 +1,7 @@
 export const PROJECT_PAGE_SIZE = 6;
 
+export const CHAT_PAGE_SIZE = 50;
+
 export const workspaceKeys = {
   activeUsers: (projectId: string) => ["activeUsers", projectId] as const,
 };
@@ -25,6 +25,7 @@ export interface RegisterData {
 export type PaginatedResponse<T> = {
   data: T[];
   hasNextPage: boolean;
+  nextCursor?: string | null;
 };
 
 export interface ProjectViewModel {
@@ -85,6 +86,16 @@ export interface UserLeftEvent {
 export interface InitEvent {
   event: "init";
   users: ActiveUserViewModel[];
+  seq: number;
+  resumed: boolean;
+  spectator: boolean;
+}
+
+export interface ViewSyncEvent {
+  event: "view_sync";
+  view_id?: string;
+  file_id?: number;
+  users: ActiveUserViewModel[];
 }
 
 export interface UserFocusChangedEvent {
@@ -214,6 +225,7 @@ export interface ChatMessageEvent {
   view_type?: ViewType;
   view_file_id?: number;
   created_at: number;
+  stream_id?: string;
 }
 
 export function chatMessageEventToViewModel(
@@ -13,9 +13,11 @@ import {
   UserJoinedEvent,
   UserLeftEvent,
   UserViewChangedEvent,
+  ViewSyncEvent,
   ViewViewModel,
 } from "@/lib/types";
 import { useQueryClient } from "@tanstack/react-query";
+import { buildQueryString } from "@/lib/utils/api-utils";
 
 function throttle<T extends (...args: any[]) => void>(
   func: T,
@@ -122,7 +124,25 @@ export function useWorkspace(params: UseWorkspaceParams) {
     );
   };
 
+  // Sequence number of the last project event applied, to resume from it after reconnecting
+  const lastSeq = useRef<number | null>(null);
+
   const handleInitEvent = (data: InitEvent) => {
+    // Missed events couldn't be replayed, reload data changed in the meantime
+    if (lastSeq.current !== null && !data.resumed) {
+      queryClient.invalidateQueries({ queryKey: ["rows"] });
+      queryClient.invalidateQueries({ queryKey: ["chartData"] });
+    }
+    lastSeq.current = data.seq;
+    setActiveUsers(data.users);
+  };
+
+  // Updates of other views aren't received, reload the data of the new one
+  const handleViewSync = (data: ViewSyncEvent) => {
+    if (data.file_id !== undefined && data.file_id !== null) {
+      queryClient.invalidateQueries({ queryKey: ["rows", data.file_id] });
+      queryClient.invalidateQueries({ queryKey: ["chartData", data.file_id] });
+    }
     setActiveUsers(data.users);
   };
 
@@ -148,17 +168,36 @@ export function useWorkspace(params: UseWorkspaceParams) {
 
   const [unreadMessages, setUnreadMessages] = useState<number>(0);
 
+  // Last chat stream position seen, to resume from it after reconnecting
+  const lastChatStreamId = useRef<string | null>(null);
+
   const handleChatMessage = (data: ChatMessageEvent) => {
+    if (data.stream_id) {
+      lastChatStreamId.current = data.stream_id;
+    }
+
+    let isNewMessage = true;
     queryClient.setQueryData(
       ["messages", params.projectId],
-      (oldMessages: ChatMessageEvent[]) => {
+      (oldMessages: ChatMessageViewModel[]) => {
         if (!oldMessages) return oldMessages;
+        // Replayed messages may already be known
+        if (oldMessages.some((message) => message.id === data.message_id)) {
+          isNewMessage = false;
+          return oldMessages;
+        }
         const chatMessage = chatMessageEventToViewModel(data);
         return [...oldMessages, chatMessage];
       },
     );
 
-    setUnreadMessages((prev) => prev + 1);
+    if (isNewMessage) {
+      setUnreadMessages((prev) => prev + 1);
+    }
+  };
+
+  const handleChatResync = () => {
+    queryClient.invalidateQueries({ queryKey: ["messages", params.projectId] });
   };
 
   const handleHeartbeat = () => {
@@ -174,28 +213,50 @@ export function useWorkspace(params: UseWorkspaceParams) {
     user_joined: handleUserJoin,
     user_left: handleUserLeft,
     init: handleInitEvent,
+    view_sync: handleViewSync,
     user_focus_changed: handleUserFocusChanged,
     user_view_changed: handleUserViewChanged,
     row_update: handleRowUpdate,
     chat_message: handleChatMessage,
+    chat_resync: handleChatResync,
     heartbeat_ack: handleHeartbeat,
   };
 
+  const handleEvent = (data: any) => {
+    if (data.event !== "init" && typeof data.seq === "number") {
+      // Updates queued while the connection was starting may already be applied
+      if (lastSeq.current !== null && data.seq <= lastSeq.current) {
+        return;
+      }
+      lastSeq.current = data.seq;
+    }
+    const handler = messageHandlers[data.event];
+    if (handler) {
+      handler(data);
+    } else {
+      console.error("Unknown event received", data.event);
+    }
+  };
+
   const handleMessage = (event: MessageEvent) => {
     try {
       const data = JSON.parse(event.data);
-      const handler = messageHandlers[data.event];
-      if (handler) {
-        handler(data);
+      // Events sent in a burst arrive together as an array
+      if (Array.isArray(data)) {
+        data.forEach(handleEvent);
       } else {
-        console.error("Unknown event received", data.event);
+        handleEvent(data);
       }
     } catch (e) {
       console.error("Error parsing message:", e);
     }
   };
 
+  // View the server routes updates for, restored after reconnecting
+  const currentViewId = useRef<string | null>(null);
+
   const changeView = throttle((view: ViewViewModel) => {
+    currentViewId.current = view.id;
     socket.current?.send(
       JSON.stringify({
         event: "view_change",
@@ -287,11 +348,19 @@ export function useWorkspace(params: UseWorkspaceParams) {
     setSocketStatus(SocketStatus.CONNECTING);
 
     const ws = new WebSocket(
-      `${process.env.NEXT_PUBLIC_WEBSOCKET_URL}/projects/${params.projectId}/collaborate`,
+      `${process.env.NEXT_PUBLIC_WEBSOCKET_URL}/projects/${params.projectId}/collaborate${buildQueryString({ lastSeq: lastSeq.current, lastChatId: lastChatStreamId.current })}`,
     );
 
     ws.onopen = () => {
       socket.current = ws;
+      if (currentViewId.current) {
+        ws.send(
+          JSON.stringify({
+            event: "view_change",
+            view_id: currentViewId.current,
+          }),
+        );
+      }
       setSocketStatus(SocketStatus.OPEN);
       startHeartbeat();
     };
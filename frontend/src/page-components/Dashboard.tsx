@@ -13,13 +13,16 @@ import { PROJECT_PAGE_SIZE } from "@/lib/constants";
 export default function Dashboard() {
   const user = useUser();
   const [page, setPage] = useState<number>(1);
+  // Cursors of the visited pages, the first page doesn't need one
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
   const [tab, setTab] = useState<ProjectListTabs>(ProjectListTabs.MINE);
 
   const runQuery = useCallback(async () => {
+    const cursor = cursors[page - 1];
     if (tab === ProjectListTabs.SHARED)
-      return listSharedProjects({ page, pageSize: PROJECT_PAGE_SIZE });
-    return listProjects({ page, pageSize: PROJECT_PAGE_SIZE });
-  }, [page, tab]);
+      return listSharedProjects({ cursor, pageSize: PROJECT_PAGE_SIZE });
+    return listProjects({ cursor, pageSize: PROJECT_PAGE_SIZE });
+  }, [page, cursors, tab]);
 
   const { data, error, isLoading } = useQuery({
     queryKey: ["projects", page, tab],
@@ -55,8 +58,13 @@ export default function Dashboard() {
       onTabChange={(value) => {
         setTab(value);
         setPage(1);
+        setCursors([undefined]);
+      }}
+      onPageNext={() => {
+        const nextCursor = data?.nextCursor ?? undefined;
+        setCursors((prevState) => [...prevState.slice(0, page), nextCursor]);
+        setPage((prevState) => prevState + 1);
       }}
-      onPageNext={() => setPage((prevState) => prevState + 1)}
       onPagePrevious={() => setPage((prevState) => prevState - 1)}
       onCreateProject={() => {
         router.push("/projects/create");
@@ -3,10 +3,11 @@ import {
   UserViewModel,
   ViewViewModel,
 } from "@/lib/types";
-import React, { useCallback } from "react";
+import React, { useCallback, useState } from "react";
 import { listChatMessages } from "@/lib/client-api";
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import ChatTab from "@/components/workspace/ChatTab";
+import { CHAT_PAGE_SIZE } from "@/lib/constants";
 
 interface ChatTabPageProps {
   projectId: string;
@@ -16,8 +17,15 @@ interface ChatTabPageProps {
 }
 
 export default function ChatTabPage(props: ChatTabPageProps) {
+  const queryClient = useQueryClient();
+  const [hasOlderMessages, setHasOlderMessages] = useState<boolean>(false);
+
+  // Only the latest page is loaded, older messages are fetched on demand
   const messagesQuery = useCallback(async () => {
-    const response = await listChatMessages(props.projectId);
+    const response = await listChatMessages(props.projectId, {
+      limit: CHAT_PAGE_SIZE,
+    });
+    setHasOlderMessages(response.length === CHAT_PAGE_SIZE);
     return response;
   }, [props.projectId]);
 
@@ -30,12 +38,32 @@ export default function ChatTabPage(props: ChatTabPageProps) {
     queryFn: messagesQuery,
   });
 
+  const loadOlderMessages = async () => {
+    if (!messages?.length) return;
+
+    const olderMessages = await listChatMessages(props.projectId, {
+      before: messages[0].id,
+      limit: CHAT_PAGE_SIZE,
+    });
+    setHasOlderMessages(olderMessages.length === CHAT_PAGE_SIZE);
+
+    queryClient.setQueryData(
+      ["messages", props.projectId],
+      (oldMessages: ChatMessageViewModel[] | undefined) => [
+        ...olderMessages,
+        ...(oldMessages ?? []),
+      ],
+    );
+  };
+
   return (
     <ChatTab
       onSendMessage={props.onSendMessage}
       onViewClicked={props.onViewClick}
       messages={messages ?? []}
       currentUserId={props.currentUser.id}
+      hasOlderMessages={hasOlderMessages}
+      onLoadOlderMessages={loadOlderMessages}
     />
   );
 }